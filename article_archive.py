@@ -0,0 +1,91 @@
+# article_archive.py
+# 以發表日期索引的文章存檔（SQLite）：每次抓到的 RSS 文章都存一份，
+# 之後要重產任何一天 / 一週的報告時直接從這裡取，不用重新抓 feed（feed 通常只保留最近幾十篇）
+import json
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from article_keys import article_keys
+from fetch_articles import get_timezone, local_day
+
+ARCHIVE_DB = ".cache/article_archive.sqlite"
+ARCHIVE_FIELDS = ("title", "summary", "publish_date", "url", "source", "categories")
+
+class ArticleArchive:
+    """
+    articles：每篇文章一列，以第一個識別鍵（正規化 URL / DOI / 標題雜湊）為主鍵，
+    publish_day 為報告時區的發表日期（YYYY-MM-DD），查詢某段日期只走索引。
+    """
+
+    def __init__(self, path=ARCHIVE_DB, tz=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tz = get_timezone(tz) if tz is None or isinstance(tz, str) else tz
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " key TEXT PRIMARY KEY,"
+            " publish_day TEXT NOT NULL,"
+            " publish_ts REAL,"
+            " source TEXT,"
+            " data TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_articles_day ON articles(publish_day);"
+            "CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source, publish_day);"
+        )
+        self.conn.commit()
+
+    def _row(self, article: dict, now: float):
+        keys = article_keys(article)
+        if not keys:
+            return None
+        try:
+            pub_dt = datetime.fromisoformat(article["publish_date"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        data = {k: article[k] for k in ARCHIVE_FIELDS if k in article}
+        return (keys[0], local_day(pub_dt, self.tz).isoformat(), pub_dt.timestamp(),
+                article.get("source"), json.dumps(data, ensure_ascii=False), now)
+
+    def add_many(self, articles) -> int:
+        """存入文章（已存在的略過），回傳新增筆數"""
+        now = time.time()
+        rows = [r for r in (self._row(a, now) for a in articles) if r is not None]
+        if not rows:
+            return 0
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def between(self, start: date, end: date, sources=None) -> list:
+        """取出 start ~ end（含）發表的文章，依來源、發表時間（新到舊）排序"""
+        sql = "SELECT data FROM articles WHERE publish_day BETWEEN ? AND ?"
+        params = [start.isoformat(), end.isoformat()]
+        if sources:
+            sql += f" AND source IN ({','.join('?' * len(sources))})"
+            params += list(sources)
+        sql += " ORDER BY source, publish_ts DESC"
+        with self._lock:
+            return [json.loads(data) for (data,) in self.conn.execute(sql, params)]
+
+    def day_counts(self, start: date, end: date) -> list:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT publish_day, COUNT(*) FROM articles WHERE publish_day BETWEEN ? AND ?"
+                " GROUP BY publish_day ORDER BY publish_day",
+                (start.isoformat(), end.isoformat()),
+            ).fetchall()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,77 @@
+# article_keys.py
+# 文章識別鍵：正規化 URL、DOI、標題雜湊
+# 跨次執行的「已處理」紀錄與跨來源去重都用同一套鍵
+import hashlib
+import re
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 追蹤用參數，不影響文章本身
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "rss", "ref", "src", "cmp", "af"}
+TRACKING_PREFIXES = ("utm_",)
+
+DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"'<>?#&]+)", re.IGNORECASE)
+_TITLE_STRIP_RE = re.compile(r"[^\w]+", re.UNICODE)
+EMPTY_TITLES = {"", "(無標題)"}
+MIN_TITLE_WORDS = 4   # "Correction"、"Editorial" 這類通用短標題不當作識別鍵
+
+def normalize_url(url: str) -> str:
+    """統一 scheme / 主機大小寫、去掉 www.、追蹤參數、fragment 與結尾斜線"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = parts.path.rstrip("/") or "/"
+    # http / https 視為同一篇
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+def extract_doi(*texts) -> str:
+    """從網址或內文找出 DOI（小寫、去掉結尾標點與 bioRxiv 的版本號）"""
+    for text in texts:
+        if not text:
+            continue
+        m = DOI_RE.search(text)
+        if not m:
+            continue
+        doi = m.group(1).rstrip(".,;:)]}").lower()
+        if doi.startswith("10.1101/"):
+            doi = re.sub(r"v\d+$", "", doi)
+            doi = re.sub(r"\.(full|abstract)(\.pdf)?$", "", doi)
+        return doi
+    return ""
+
+def normalize_title(title: str) -> str:
+    """NFKC + 小寫 + 移除標點，多個空白合併為一個"""
+    t = unicodedata.normalize("NFKC", title or "").lower()
+    return " ".join(_TITLE_STRIP_RE.sub(" ", t).split())
+
+def title_hash(title: str) -> str:
+    if (title or "").strip() in EMPTY_TITLES:
+        return ""
+    norm = normalize_title(title)
+    words = norm.split()
+    if len(words) < MIN_TITLE_WORDS and not (len(words) == 1 and len(norm) >= 12):
+        return ""
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()[:16]
+
+def article_keys(article: dict) -> list:
+    """回傳文章的所有識別鍵，例如 ["url:...", "doi:...", "title:..."]"""
+    keys = []
+    url = normalize_url(article.get("url", "") or "")
+    if url:
+        keys.append(f"url:{url}")
+    doi = extract_doi(article.get("url", ""), article.get("summary", ""))
+    if doi:
+        keys.append(f"doi:{doi}")
+    th = title_hash(article.get("title", ""))
+    if th:
+        keys.append(f"title:{th}")
+    return keys
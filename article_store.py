@@ -0,0 +1,268 @@
+# article_store.py
+# 文章紀錄與報告內容存放處：
+#   Article：管線中流動的文章（固定欄位用 __slots__，同時支援 dict 式存取，既有各階段不用改寫）
+#   ArticleStore：每份報告入選的文章連同摘要、命中關鍵字存進 SQLite（.cache/articles.sqlite），
+#                 title.txt、LINE 推播與匯出都從這裡查詢，不必再回頭解析 Markdown
+#
+#   python article_store.py titles --date 20251003             依報告順序列出標題（加上編號）
+#   python article_store.py export --date 20251003 --format jsonl --out report.jsonl
+#   python article_store.py export --start 20251001 --end 20251007 --format parquet --out week.parquet
+#       parquet 需要 pyarrow（pip install pyarrow）
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from article_keys import article_keys
+
+ARTICLE_STORE_DB = ".cache/articles.sqlite"
+
+ARTICLE_FIELDS = (
+    "title", "summary", "publish_date", "url", "source", "categories",   # RSS
+    "text",                                                             # 送給 LLM 的內容（全文或摘要）
+    "hits", "domain", "score",                                          # 篩選 / 分類 / 排序結果
+    "duplicates",                                                       # 跨來源重複的其他版本
+    "report", "headline",                                               # LLM 產出的摘要與導讀（Markdown）及其標題
+)
+_FIELD_SET = frozenset(ARTICLE_FIELDS)
+
+class Article:
+    """
+    一篇文章。ARTICLE_FIELDS 以外的鍵（text_tokens、fulltext 等階段內部標記）放在 extra。
+    沒設定過的欄位視為不存在：`"text" in article` 為 False，article.get("hits", []) 回傳預設值。
+    """
+    __slots__ = ARTICLE_FIELDS + ("extra",)
+
+    def __init__(self, **fields):
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data) -> "Article":
+        return data if isinstance(data, cls) else cls(**data)
+
+    def __getitem__(self, key):
+        try:
+            if key in _FIELD_SET:
+                return getattr(self, key)
+            if self.extra is not None:
+                return self.extra[key]
+        except (AttributeError, KeyError):
+            pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return self.extra is not None and key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> list:
+        return [k for k in ARTICLE_FIELDS if hasattr(self, k)] + list(self.extra or ())
+
+    def to_dict(self) -> dict:
+        return {k: self[k] for k in self.keys()}
+
+    def __repr__(self):
+        return f"Article(title={self.get('title')!r}, source={self.get('source')!r})"
+
+def report_headline(report: str) -> str:
+    """LLM 報告的標題：第一個非空行以 # 開頭時取其文字（與 PDF 中的 H1 相同），否則回傳空字串"""
+    for line in (report or "").splitlines():
+        line = line.strip()
+        if line:
+            return line.lstrip("# ").strip() if line.startswith("#") else ""
+    return ""
+
+def ensure_headline(report: str, title: str) -> str:
+    """
+    確保報告第一行是 H1（「# 標題」）：LLM 有寫標題時統一成一個 #，沒有時以原文標題補上，
+    PDF / HTML / JSON 的各篇標題與 headline（title.txt、LINE 推播）因此一致
+    """
+    lines = (report or "").strip().splitlines()
+    if lines and lines[0].startswith("#") and lines[0].lstrip("# ").strip():
+        lines[0] = "# " + lines[0].lstrip("# ").strip()
+        return "\n".join(lines)
+    return f"# {(title or '(無標題)').strip()}\n\n" + "\n".join(lines)
+
+# ===== 報告文章存放處 =====
+# 存進資料庫的欄位（duplicates / text 等只在管線中使用，不存）
+STORED_FIELDS = ("title", "headline", "url", "source", "publish_date", "domain", "summary", "hits", "score",
+                 "categories", "report")
+_JSON_FIELDS = ("hits", "categories")
+
+class ArticleStore:
+    """
+    report_articles：每份報告（report_date = YYYYMMDD）入選並完成摘要的文章一列，
+    position 為寫進報告的順序；以 (report_date, 第一個識別鍵) 為主鍵，同一天重跑不會重複。
+    publish_date / domain / source 各有索引，方便跨日查詢。
+    """
+
+    def __init__(self, path=ARTICLE_STORE_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS report_articles ("
+            " report_date TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " key TEXT NOT NULL,"
+            " title TEXT, headline TEXT, url TEXT, source TEXT, publish_date TEXT, domain TEXT,"
+            " summary TEXT, hits TEXT, score REAL, categories TEXT, report TEXT,"
+            " stored_at REAL NOT NULL,"
+            " PRIMARY KEY (report_date, key));"
+            "CREATE INDEX IF NOT EXISTS idx_report_articles_published ON report_articles(publish_date);"
+            "CREATE INDEX IF NOT EXISTS idx_report_articles_domain ON report_articles(domain, report_date);"
+            "CREATE INDEX IF NOT EXISTS idx_report_articles_source ON report_articles(source, report_date);"
+        )
+        self.conn.commit()
+
+    def add(self, article, report_date: str) -> bool:
+        """把完成摘要的文章加到 report_date 報告的最後；沒有識別鍵的文章無法存放，回傳 False"""
+        keys = article_keys(article)
+        if not keys:
+            return False
+        values = []
+        for field in STORED_FIELDS:
+            value = article.get(field)
+            values.append(json.dumps(value or [], ensure_ascii=False) if field in _JSON_FIELDS else value)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT position FROM report_articles WHERE report_date = ? AND key = ?", (report_date, keys[0])
+            ).fetchone()
+            if row is None:
+                row = self.conn.execute(
+                    "SELECT COALESCE(MAX(position), 0) + 1 FROM report_articles WHERE report_date = ?", (report_date,)
+                ).fetchone()
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO report_articles (report_date, position, key, {', '.join(STORED_FIELDS)},"
+                f" stored_at) VALUES (?, ?, ?, {', '.join('?' * len(STORED_FIELDS))}, ?)",
+                [report_date, row[0], keys[0], *values, time.time()],
+            )
+            self.conn.commit()
+        return True
+
+    def clear_report(self, report_date: str) -> int:
+        """同一天從頭重跑時先清掉舊的內容"""
+        with self._lock:
+            cur = self.conn.execute("DELETE FROM report_articles WHERE report_date = ?", (report_date,))
+            self.conn.commit()
+            return cur.rowcount
+
+    def _select(self, where: str, params: list) -> list:
+        sql = (f"SELECT report_date, {', '.join(STORED_FIELDS)} FROM report_articles"
+               f" WHERE {where} ORDER BY report_date, position")
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        articles = []
+        for report_date, *values in rows:
+            article = Article(**dict(zip(STORED_FIELDS, values)))
+            for field in _JSON_FIELDS:
+                article[field] = json.loads(article[field] or "[]")
+            article["report_date"] = report_date
+            articles.append(article)
+        return articles
+
+    def articles(self, report_date: str, domain: str = None, source: str = None) -> list:
+        """report_date 報告中的文章（依報告順序），可再依領域 / 來源篩選"""
+        where, params = "report_date = ?", [report_date]
+        if domain is not None:
+            where += " AND domain = ?"
+            params.append(domain)
+        if source is not None:
+            where += " AND source = ?"
+            params.append(source)
+        return self._select(where, params)
+
+    def between(self, start: str, end: str) -> list:
+        """start ~ end（YYYYMMDD，含）各份報告的文章"""
+        return self._select("report_date BETWEEN ? AND ?", [start, end])
+
+    def titles(self, report_date: str) -> list:
+        """報告中的標題（LLM 產生的中文標題，沒有時用原文標題），即 PDF 的各篇 H1"""
+        with self._lock:
+            return [t for (t,) in self.conn.execute(
+                "SELECT COALESCE(NULLIF(headline, ''), title) FROM report_articles"
+                " WHERE report_date = ? ORDER BY position", (report_date,)
+            )]
+
+    def domain_counts(self, report_date: str) -> dict:
+        with self._lock:
+            return dict(self.conn.execute(
+                "SELECT domain, COUNT(*) FROM report_articles WHERE report_date = ? GROUP BY domain", (report_date,)
+            ).fetchall())
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# ===== 匯出 =====
+def export_jsonl(articles: list, path) -> int:
+    with open(path, "w", encoding="utf-8") as f:
+        for article in articles:
+            f.write(json.dumps(article.to_dict(), ensure_ascii=False) + "\n")
+    return len(articles)
+
+def export_parquet(articles: list, path) -> int:
+    """欄式匯出（需要 pyarrow）；沒有安裝時回傳 0"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("⚠️ 未安裝 pyarrow，無法匯出 parquet（pip install pyarrow，或改用 --format jsonl）")
+        return 0
+    columns = ("report_date",) + STORED_FIELDS
+    table = pa.table({c: [a.get(c) for a in articles] for c in columns})
+    pq.write_table(table, str(path))
+    return len(articles)
+
+def main():
+    ap = argparse.ArgumentParser(description="查詢 / 匯出報告文章")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("titles", help="依報告順序列出標題（LINE 推播用）")
+    p.add_argument("--date", required=True, help="報告日期 YYYYMMDD")
+    p = sub.add_parser("export")
+    p.add_argument("--date", help="單一報告日期 YYYYMMDD")
+    p.add_argument("--start", help="起始報告日期 YYYYMMDD（搭配 --end）")
+    p.add_argument("--end", help="結束報告日期 YYYYMMDD（預設與 --start 相同）")
+    p.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    p.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    store = ArticleStore()
+    try:
+        if args.command == "titles":
+            for i, title in enumerate(store.titles(args.date), 1):
+                print(f"{i:>2}. {title}")
+            return
+        if args.date:
+            articles = store.articles(args.date)
+        elif args.start:
+            articles = store.between(args.start, args.end or args.start)
+        else:
+            ap.error("export 需要 --date 或 --start")
+        n = (export_parquet if args.format == "parquet" else export_jsonl)(articles, args.out)
+        if n:
+            print(f"✅ 已匯出 {n} 篇到 {args.out}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# backfill.py
+# 多日回補與重產報告：
+#   python backfill.py fetch  --start 2025-10-01 --end 2025-10-07 [--tz Asia/Taipei]
+#       抓取所有來源在日期區間內（報告時區）的文章並存入 article_archive（feed 只保留最近的文章，能回補多遠取決於來源）
+#   python backfill.py list   --start 2025-10-01 --end 2025-10-07
+#       列出存檔中每天的文章數
+#   python backfill.py report --date 2025-10-03 [--days 2] [--tz Asia/Taipei]
+#       不抓 RSS，直接以存檔中 date 往前 days 天（含當天）的文章重產該日報告（--days 7 即一週）
+import argparse
+from datetime import date, timedelta
+
+import fetch_articles
+from article_archive import ArticleArchive
+from fetch_articles import fetch_feeds_concurrently, fetch_window, get_timezone, load_urls, save_feed_cache
+
+def backfill(urls: list, start: date, end: date, tz, archive: ArticleArchive) -> int:
+    """並行抓取所有來源的 start ~ end 文章並存檔，回傳新增筆數"""
+    added = 0
+    for url, articles, err in fetch_feeds_concurrently(urls, fetch=lambda u: fetch_window(u, start, end, tz)):
+        if err is not None:
+            print(f"❌ 來源處理失敗：{url} → {err}")
+            continue
+        for article in articles:
+            article["source"] = url
+        n = archive.add_many(articles)
+        added += n
+        print(f"📰 {url}：區間內 {len(articles)} 篇，新存入 {n} 篇")
+    save_feed_cache()
+    return added
+
+def regenerate(report_day: date, days: int, archive: ArticleArchive, urls: list):
+    import main as pipeline
+
+    start = report_day - timedelta(days=max(1, days) - 1)
+    articles = archive.between(start, report_day)
+    # 依 urls.txt 的來源順序排列，與每日執行的輸出順序一致
+    order = {url: i for i, url in enumerate(urls)}
+    articles.sort(key=lambda a: order.get(a.get("source"), len(order)))
+    pipeline.main(report_date=report_day.strftime("%Y%m%d"), archived_articles=articles)
+
+def main():
+    ap = argparse.ArgumentParser(description="多日回補與重產過去的報告")
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name in ("fetch", "list"):
+        p = sub.add_parser(name)
+        p.add_argument("--start", type=date.fromisoformat, required=True)
+        p.add_argument("--end", type=date.fromisoformat, default=date.today())
+    p = sub.add_parser("report")
+    p.add_argument("--date", type=date.fromisoformat, required=True)
+    p.add_argument("--days", type=int, default=2, help="往前涵蓋幾天（含當天），預設 2 與每日執行相同")
+    for p in sub.choices.values():
+        p.add_argument("--tz", default=None, help="報告時區，例如 Asia/Taipei（預設系統時區）")
+    args = ap.parse_args()
+
+    if args.tz:
+        fetch_articles.REPORT_TIMEZONE = args.tz
+    tz = get_timezone(args.tz)
+    urls = load_urls()
+    archive = ArticleArchive(tz=tz)
+    try:
+        if args.command == "fetch":
+            added = backfill(urls, args.start, args.end, tz, archive)
+            print(f"✅ 回補完成：新存入 {added} 篇，存檔共 {len(archive)} 篇")
+        elif args.command == "list":
+            for day, n in archive.day_counts(args.start, args.end):
+                print(f"{day}  {n:>5} 篇")
+        else:
+            regenerate(args.date, args.days, archive, urls)
+    finally:
+        archive.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_classifier.py
+# 領域分類比較：關鍵字規則（KeywordMatcher，DOMAIN_MAP 第一個命中的領域）vs 向量中心分類（embed_classifier）
+# embedding 只用種子詞彙建中心；hybrid 另以規則已分類的文章修正中心（main.py 的用法）
+# 1. 準確率：classifier_fixture.jsonl 為人工標註的標題 + 摘要
+# 2. 吞吐量：把夾具文章加上編號複製到 N 篇，量測批次分類速度（首次計算 / 命中向量快取）
+#
+# 用法（在專案根目錄）：
+#   python benchmarks/bench_classifier.py [--size 5000]
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT))
+
+import embed_classifier  # noqa: E402
+import main as pipeline  # noqa: E402
+
+FIXTURE = BENCH_DIR / "classifier_fixture.jsonl"
+
+def load_fixture() -> list:
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def rule_domain(article: dict) -> str:
+    _, _, domain = pipeline.match_article(dict(article))
+    return domain
+
+def report(name: str, rows: list, predicted: list):
+    correct = sum(p == r["label"] for p, r in zip(predicted, rows))
+    other = sum(p == "other" for p in predicted)
+    print(f"{name:>10}：準確率 {correct}/{len(rows)} = {correct / len(rows):.1%}，歸為 other {other} 篇")
+    wrong = Counter((r["label"], p) for p, r in zip(predicted, rows) if p != r["label"])
+    for (label, pred), n in wrong.most_common(5):
+        print(f"{'':>12}{label} → {pred} ×{n}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, default=5000)
+    args = ap.parse_args()
+
+    if not embed_classifier.available():
+        print("⚠️ 需要 numpy：pip install numpy")
+        return
+
+    rows = load_fixture()
+    rules = [rule_domain(r) for r in rows]
+    report("rules", rows, rules)
+    clf = embed_classifier.CentroidClassifier(pipeline.DOMAIN_MAP)
+    report("embedding", rows, clf.classify_many(rows))
+    report("hybrid", rows, clf.classify_many(rows, rules))
+
+    big = [{"title": f"{r['title']} ({i})", "summary": r["summary"]}
+           for i in range(args.size // len(rows) + 1) for r in rows][:args.size]
+    t0 = time.perf_counter()
+    big_rules = [rule_domain(r) for r in big]
+    rules_sec = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = embed_classifier.EmbeddingCache(os.path.join(tmp, "emb.sqlite"))
+        cached_clf = embed_classifier.CentroidClassifier(pipeline.DOMAIN_MAP, cache=cache)
+        t0 = time.perf_counter()
+        cached_clf.classify_many(big, big_rules)
+        cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        cached_clf.classify_many(big, big_rules)
+        warm = time.perf_counter() - t0
+        cache.close()
+
+    print(f"\n吞吐量（{len(big)} 篇）：")
+    print(f"  rules            {len(big) / rules_sec:>10.0f} 篇/秒")
+    print(f"  embedding（首次）{len(big) / cold:>10.0f} 篇/秒")
+    print(f"  embedding（快取）{len(big) / warm:>10.0f} 篇/秒")
+
+if __name__ == "__main__":
+    main()
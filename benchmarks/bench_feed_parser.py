@@ -0,0 +1,80 @@
+# benchmarks/bench_feed_parser.py
+# RSS / Atom 解析 benchmark：原本 BeautifulSoup(xml) + item.find() 的作法
+# 對照 feed_parser（lxml iterparse 串流解析、逐篇清除、日期窗外提早停止）。
+#
+# 用法（在專案根目錄）：python benchmarks/bench_feed_parser.py [--items 200,2000] [--fixtures-dir DIR]
+# 對照組需要 BeautifulSoup：pip install -r benchmarks/requirements.txt
+import argparse
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning  # noqa: E402
+
+from fetch_articles import parse_feed_items, parse_rss_date  # noqa: E402
+from fixtures import FORMATS, write_fixture_feeds  # noqa: E402
+
+warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+# ===== 原本 fetch_today_from_rss 的解析方式（只認得 <item>） =====
+def legacy_parse(data):
+    soup = BeautifulSoup(data, "xml")
+    articles = []
+    for item in soup.find_all("item"):
+        link = item.find("link").get_text(strip=True) if item.find("link") else None
+        title = item.find("title").get_text(strip=True) if item.find("title") else "(無標題)"
+        description = item.find("description").get_text(strip=True) if item.find("description") else ""
+        pub_date_tag = item.find("pubDate") or item.find("dc:date")
+        if not link or not pub_date_tag:
+            continue
+        try:
+            pub_dt = parse_rss_date(pub_date_tag.get_text(strip=True))
+        except Exception:
+            continue
+        articles.append({"title": title, "summary": description,
+                         "publish_date": pub_dt.isoformat(), "url": link})
+    return articles
+
+def measure(fn, data, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", default="200,2000")
+    ap.add_argument("--fixtures-dir", default=None, help="保留產生的夾具檔案（預設只在記憶體中）")
+    args = ap.parse_args()
+
+    since = (datetime.now() - timedelta(days=1)).date()
+    print(f"{'format':>6} {'items':>6} | {'bs4 ms':>8} {'bs4 MB':>7} {'n':>5} | "
+          f"{'lxml ms':>8} {'lxml MB':>8} {'n':>5} | {'lxml+window ms':>14} {'n':>4} | speedup")
+    for n in (int(x) for x in args.items.split(",")):
+        if args.fixtures_dir:
+            feeds = {k: p.read_bytes() for k, p in write_fixture_feeds(args.fixtures_dir, n).items()}
+        else:
+            feeds = {name: make(n) for name, make in FORMATS.items()}
+        for name, data in feeds.items():
+            t_old, m_old, n_old = measure(legacy_parse, data)
+            t_new, m_new, n_new = measure(parse_feed_items, data)
+            t_win, _, n_win = measure(lambda d: parse_feed_items(d, since=since), data)
+            print(f"{name:>6} {n:>6} | {t_old * 1000:>8.1f} {m_old / 2**20:>7.1f} {n_old:>5} | "
+                  f"{t_new * 1000:>8.1f} {m_new / 2**20:>8.1f} {n_new:>5} | {t_win * 1000:>14.1f} {n_win:>4} | "
+                  f"{t_old / t_new:>5.1f}x / {t_old / t_win:.0f}x")
+
+if __name__ == "__main__":
+    main()
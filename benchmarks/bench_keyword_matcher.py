@@ -0,0 +1,112 @@
+# benchmarks/bench_keyword_matcher.py
+# 關鍵字比對 micro-benchmark：原本「每個關鍵字一個 regex + classify_domain 子字串掃描」
+# 對照 keyword_matcher.KeywordMatcher 單次掃描，關鍵字數量從 keywords.txt 擴充到數千個。
+#
+# 用法（在專案根目錄）：python benchmarks/bench_keyword_matcher.py [--articles 200] [--sizes 0,500,2000,5000]
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+def load_sections(path):
+    """讀 keywords.txt，依「# 區段標題」分組，當作 benchmark 用的 DOMAIN_MAP"""
+    sections, current = {}, "misc"
+    for ln in Path(path).read_text(encoding="utf-8").splitlines():
+        ln = ln.strip()
+        if not ln:
+            continue
+        if ln.startswith("#"):
+            name = ln.strip("# =").strip()
+            if name:
+                current = name
+            continue
+        sections.setdefault(current, []).append(ln)
+    return sections
+
+# ===== 原本 main.py 的作法 =====
+def legacy_matcher(keywords, domain_map):
+    def pattern(kw):
+        if re.fullmatch(r"[A-Za-z0-9\-\+_/\.]+", kw):
+            return re.compile(rf"\b{re.escape(kw)}\b", flags=re.IGNORECASE)
+        return re.compile(re.escape(kw), flags=re.IGNORECASE)
+
+    patterns = [(pattern(kw), kw) for kw in keywords]
+
+    def scan(text):
+        hits = [raw for pat, raw in patterns if pat.search(text)]
+        t = text.lower()
+        for domain, kws in domain_map.items():
+            if any(k.lower() in t for k in kws):
+                return hits, domain
+        return hits, "other"
+
+    return scan
+
+def synthetic_keywords(rng, n):
+    syllables = ["neo", "cardio", "vas", "gen", "omic", "path", "cyto", "lys", "tron", "scan",
+                 "myo", "graph", "plex", "bio", "thera", "kine", "sept", "derm", "onco", "morph"]
+    out = set()
+    while len(out) < n:
+        word = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.4:
+            word += " " + "".join(rng.choice(syllables) for _ in range(rng.randint(2, 3)))
+        if rng.random() < 0.1:
+            word = word.upper()
+        out.add(word)
+    return sorted(out)
+
+def synthetic_texts(rng, keywords, n, words=180):
+    vocab = ("the of and in to with for patients study model results data clinical trial "
+             "cells signal analysis using method risk outcome cohort response").split()
+    texts = []
+    for _ in range(n):
+        toks = [rng.choice(vocab) for _ in range(words)]
+        for _ in range(rng.randint(0, 4)):
+            toks.insert(rng.randrange(len(toks)), rng.choice(keywords))
+        texts.append(" ".join(toks).capitalize() + ".")
+    return texts
+
+def bench(fn, texts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles", type=int, default=200)
+    ap.add_argument("--sizes", default="0,500,2000,5000", help="額外加入的合成關鍵字數量")
+    args = ap.parse_args()
+
+    rng = random.Random(7)
+    sections = load_sections(ROOT / "keywords.txt")
+    base = [kw for kws in sections.values() for kw in kws]
+
+    print(f"{'keywords':>9} {'legacy (ms)':>12} {'matcher (ms)':>13} {'speedup':>8}  same results")
+    for extra in (int(x) for x in args.sizes.split(",")):
+        keywords = base + synthetic_keywords(rng, extra)
+        domain_map = dict(sections)
+        if extra:
+            domain_map["synthetic"] = keywords[len(base):]
+        texts = synthetic_texts(rng, keywords, args.articles)
+
+        legacy = legacy_matcher(keywords, domain_map)
+        matcher = KeywordMatcher(keywords, domain_map)
+        same = all(legacy(t) == matcher.scan(t) for t in texts)
+
+        t_legacy = bench(legacy, texts)
+        t_new = bench(matcher.scan, texts)
+        print(f"{len(keywords):>9} {t_legacy * 1000:>12.1f} {t_new * 1000:>13.1f} {t_legacy / t_new:>7.1f}x  {same}")
+
+if __name__ == "__main__":
+    main()
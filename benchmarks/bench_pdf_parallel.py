@@ -0,0 +1,82 @@
+# benchmarks/bench_pdf_parallel.py
+# 比較單行程 generate_pdf 與多行程 generate_pdf_parallel（分段渲染 + pypdf 合併 + 重蓋頁碼）
+# 在不同文章數 / 行程數下的耗時，並檢查兩者頁數與 title.txt 是否一致。
+# 注意：片段各自從新的一頁開始，頁數可能比單行程多出（片段數 - 1）頁以內。
+#
+# 用法（在專案根目錄）：
+#   python benchmarks/bench_pdf_parallel.py [--articles 20,100] [--workers 1,2,4] [--repeat 1]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fakes import ensure_pdf_fonts  # noqa: E402
+
+ensure_pdf_fonts()
+
+import generate_pdf_summary as pdf  # noqa: E402
+
+BODY = (
+    "## 摘要\n" + "固定輸出的摘要內容，描述穿戴式裝置的生理訊號量測與演算法。" * 6 + "\n\n"
+    "## 導讀\n" + "以初學者角度說明研究動機、方法與限制。" * 8 + "\n\n"
+    "## 學習路徑\n- 生理訊號\n- 訊號處理\n- 機器學習\n\n"
+    "## 原文連結\n[點擊連結](https://example.org)"
+)
+
+def make_blocks(n: int) -> list:
+    """產生與 main.py 寫出的 Markdown 區塊相同結構的文章"""
+    return [f"# 測試標題 {i}\n\n{BODY}\n\n🔗 原文連結：https://example.org/{i}" for i in range(n)]
+
+def page_count(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles", default="20,100")
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args()
+
+    print(f"CPU 核心數：{os.cpu_count()}")
+    print(f"{'articles':>8} {'mode':>12} {'seconds':>9} {'speedup':>8} {'pages':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)   # title.txt 寫在暫存目錄
+        try:
+            for n in (int(x) for x in args.articles.split(",")):
+                blocks = make_blocks(n)
+                serial_out = os.path.join(tmp, f"serial_{n}.pdf")
+                base = timed(lambda: pdf.generate_pdf(blocks, output_file=serial_out), args.repeat)
+                serial_titles = Path("title.txt").read_text(encoding="utf-8")
+                print(f"{n:>8} {'serial':>12} {base:>9.3f} {1.0:>8.2f} {page_count(serial_out):>6}")
+
+                for w in (int(x) for x in args.workers.split(",")):
+                    out = os.path.join(tmp, f"parallel_{n}_{w}.pdf")
+                    sec = timed(lambda: pdf.generate_pdf_parallel(blocks, output_file=out, workers=w), args.repeat)
+                    same = Path("title.txt").read_text(encoding="utf-8") == serial_titles
+                    print(f"{n:>8} {f'workers={w}':>12} {sec:>9.3f} {base / sec:>8.2f} {page_count(out):>6}"
+                          f"{'' if same else '  ⚠️ 標題不一致'}")
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
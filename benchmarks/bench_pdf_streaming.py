@@ -0,0 +1,81 @@
+# benchmarks/bench_pdf_streaming.py
+# 比較整份載入（readlines + 完整 story 串列）與串流（generate_pdf_streaming）產生 PDF 的
+# 記憶體峰值（tracemalloc）與耗時，並檢查兩者頁數與 title.txt 是否一致。
+#
+# 用法（在專案根目錄）：
+#   python benchmarks/bench_pdf_streaming.py [--articles 30,300,3000]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fakes import ensure_pdf_fonts  # noqa: E402
+
+ensure_pdf_fonts()
+
+import generate_pdf_summary as pdf  # noqa: E402
+from bench_pdf_parallel import BODY, page_count  # noqa: E402
+
+SEPARATOR = "-" * 90
+
+def write_report(path: str, n: int):
+    """寫出與 main.py write_stage 相同格式的 news_report"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(f"# 測試標題 {i}\n\n{BODY}\n\n🔗 原文連結：https://example.org/{i}\n    \n\n{SEPARATOR}\n\n")
+
+def in_memory(md_file: str, output_file: str):
+    """串流化之前的做法：整份檔案切成區塊，story 全部建好才交給 doc.build()"""
+    paragraphs, _ = pdf.extract_references_from_md(md_file)
+    story = pdf._cover_story()
+    article_story, all_titles = pdf.build_article_story(paragraphs)
+    story.extend(article_story)
+    pdf.write_titles(all_titles)
+    pdf._build_doc(story, output_file)
+
+def measure(fn) -> tuple:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    sec = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sec, peak / 2 ** 20
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles", default="30,300,3000")
+    args = ap.parse_args()
+
+    print(f"{'articles':>8} {'mode':>10} {'seconds':>9} {'peak MiB':>9} {'pages':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)   # title.txt 寫在暫存目錄
+        try:
+            for n in (int(x) for x in args.articles.split(",")):
+                md_file = os.path.join(tmp, f"report_{n}.md")
+                write_report(md_file, n)
+                results = {}
+                for mode, fn in (("in-memory", in_memory), ("streaming", pdf.generate_pdf_streaming)):
+                    out = os.path.join(tmp, f"{mode}_{n}.pdf")
+                    sec, peak = measure(lambda: fn(md_file, out))
+                    results[mode] = (page_count(out), Path("title.txt").read_text(encoding="utf-8"))
+                    print(f"{n:>8} {mode:>10} {sec:>9.2f} {peak:>9.1f} {results[mode][0]:>6}")
+                if results["in-memory"] != results["streaming"]:
+                    print(f"{'':>8} ⚠️ 頁數或標題不一致")
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
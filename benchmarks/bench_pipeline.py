@@ -0,0 +1,141 @@
+# benchmarks/bench_pipeline.py
+# 端到端管線 benchmark：本機伺服器重播夾具 RSS，OpenAI client 換成固定輸出的假 client，
+# 依序量測 fetch → filter（去重 / 關鍵字 / 領域）→ summarize → Markdown 寫入 → PDF
+# 在不同文章數量下的耗時、吞吐量與記憶體峰值。
+#
+# 用法（在專案根目錄）：
+#   python benchmarks/bench_pipeline.py [--sizes 10,100,1000,10000] [--llm-latency 0.02] [--batch-size 5] [--skip-pdf] [--json out.json]
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fakes import FakeOpenAI, FeedServer, ensure_pdf_fonts  # noqa: E402
+from fixtures import make_rss2  # noqa: E402
+
+import fetch_articles  # noqa: E402
+import main as pipeline  # noqa: E402
+import summarize_with_llm  # noqa: E402
+from generate_pdf_summary import md_to_pdf  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+
+FEEDS = 47   # 與 urls.txt 的來源數相同
+
+class StageTimer:
+    def __init__(self, track_memory: bool):
+        self.track_memory = track_memory
+        self.rows = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str, items_fn):
+        if self.track_memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if self.track_memory else 0
+        items = items_fn()
+        self.rows.append({"stage": name, "seconds": elapsed, "items": items,
+                          "items_per_sec": items / elapsed if elapsed else 0.0,
+                          "peak_mb": peak / 2**20})
+
+def build_feeds(n: int) -> dict:
+    feeds = min(FEEDS, n)
+    per_feed = [n // feeds + (1 if i < n % feeds else 0) for i in range(feeds)]
+    # 所有文章都落在「今天 / 昨天」的時間窗內
+    return {f"/feed/{i}.xml": make_rss2(k, span_hours=20, seed=100 + i) for i, k in enumerate(per_feed)}
+
+def run_size(n: int, args, workdir: Path) -> list:
+    timer = StageTimer(track_memory=not args.no_memory)
+    report_date = datetime.today().strftime("%Y%m%d")
+    md_file = workdir / f"news_report_{n}.md"
+    pdf_file = workdir / f"news_summary_{n}.pdf"
+    md_file.unlink(missing_ok=True)
+
+    fake = FakeOpenAI(latency=args.llm_latency)
+    summarize_with_llm.client = fake
+    pipeline.MAX_PER_DOMAIN = n   # 不設領域上限，讓所有文章都走完整條管線
+
+    with FeedServer(build_feeds(n)) as server:
+        stats = pipeline.new_stats()
+        fetched = []
+        with timer.stage("fetch", lambda: len(fetched)):
+            fetched = list(pipeline.fetch_stage(server.urls(), stats))
+
+    domain_count = {d: 0 for d in pipeline.DOMAIN_MAP}
+    selected = []
+    with timer.stage("filter", lambda: len(fetched)):
+        selected = list(pipeline.classify_stage(
+            pipeline.filter_stage(pipeline.dedup_stage(fetched), stats, report_date), domain_count))
+
+    results = []
+    with timer.stage("summarize", lambda: len(results)):
+        results = list(pipeline.summarize_stage(selected))
+
+    with timer.stage("markdown", lambda: stats["success"]):
+        pipeline.write_stage(results, str(md_file), stats, report_date)
+
+    if not args.skip_pdf:
+        with timer.stage("pdf", lambda: stats["success"]):
+            md_to_pdf(str(md_file), str(pdf_file))
+
+    for row in timer.rows:
+        row["articles"] = n
+    print(f"   ↳ {n} 篇：抓到 {len(fetched)}、入選 {len(selected)}、寫入 {stats['success']}、"
+          f"LLM 呼叫 {fake.calls} 次")
+    return timer.rows
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,100,1000,10000")
+    ap.add_argument("--llm-latency", type=float, default=0.02, help="假 LLM 每次呼叫的延遲（秒）")
+    ap.add_argument("--batch-size", type=int, default=0, help="每次 LLM 請求合併幾篇（0 為逐篇）")
+    ap.add_argument("--skip-pdf", action="store_true")
+    ap.add_argument("--no-memory", action="store_true", help="不追蹤記憶體（tracemalloc 會拖慢計時）")
+    ap.add_argument("--json", default=None, help="另存結果為 JSON，方便比較回歸")
+    args = ap.parse_args()
+
+    # 假 LLM 不需要限速與快取；RSS 快取關閉以量測完整下載與解析
+    summarize_with_llm.LLM_CACHE_BYPASS = True
+    summarize_with_llm.LLM_BATCH_SIZE = args.batch_size
+    summarize_with_llm.rate_limiter = RateLimiter(1e9, 1e12)
+    fetch_articles.USE_FEED_CACHE = False
+    ensure_pdf_fonts()
+
+    if not args.no_memory:
+        tracemalloc.start()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)   # generate_pdf 會寫 title.txt 到工作目錄
+        try:
+            for n in (int(x) for x in args.sizes.split(",")):
+                print(f"▶ {n} 篇文章")
+                rows.extend(run_size(n, args, Path(tmp)))
+        finally:
+            os.chdir(cwd)
+
+    print(f"\n{'articles':>8} {'stage':>10} {'wall s':>9} {'items/s':>10} {'peak MB':>8}")
+    for r in rows:
+        print(f"{r['articles']:>8} {r['stage']:>10} {r['seconds']:>9.3f} {r['items_per_sec']:>10.1f} {r['peak_mb']:>8.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
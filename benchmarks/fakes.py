@@ -0,0 +1,115 @@
+# benchmarks/fakes.py
+# benchmark 用的替身：本機 RSS 伺服器（重播夾具 feed）與固定輸出的假 OpenAI client
+import hashlib
+import http.server
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+
+class FeedServer:
+    """在 127.0.0.1 隨機埠重播 feeds（{路徑: bytes}），支援 ETag / 304"""
+
+    def __init__(self, feeds: dict, latency: float = 0.0):
+        self.feeds = feeds
+        self.latency = latency
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = server.feeds.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def urls(self) -> list:
+        return [self.base_url + path for path in self.feeds]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class _FakeCompletions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, messages, temperature=None, **kwargs):
+        owner = self.owner
+        with owner.lock:
+            owner.calls += 1
+        if owner.latency:
+            time.sleep(owner.latency)
+        prompt = messages[-1]["content"]
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        if kwargs.get("response_format", {}).get("type") == "json_object":
+            # 批次摘要：依 prompt 中的 [ID] 逐篇回傳
+            ids = re.findall(r"^\[(\w+)\]$", prompt, re.M)
+            content = json.dumps({"articles": [
+                {"id": aid, "title": f"測試標題 {digest}-{aid}", "summary": f"固定輸出的摘要內容（{model}）。",
+                 "guide": "以初學者角度說明（benchmark）。", "learning_path": "生理訊號 → 訊號處理 → 機器學習"}
+                for aid in ids
+            ]}, ensure_ascii=False)
+        else:
+            content = (
+                f"# 測試標題 {digest}\n\n## 摘要\n固定輸出的摘要內容（{model}）。\n\n"
+                "## 導讀\n以初學者角度說明（benchmark）。\n\n"
+                "## 學習路徑\n生理訊號 → 訊號處理 → 機器學習\n\n"
+                "## 原文連結\n[點擊連結](https://example.org)\n"
+            )
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4,
+                                total_tokens=(len(prompt) + len(content)) // 4)
+        return SimpleNamespace(
+            model=model, usage=usage,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+        )
+
+class FakeOpenAI:
+    """只實作 client.chat.completions.create；latency 為每次呼叫的模擬延遲（秒）"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+def ensure_pdf_fonts():
+    """沒有 biaokai.ttc 時，用專案內的 Times New Roman 代替 Biaokai（只影響字形，不影響計時）"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if "Biaokai" not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont("Biaokai", str(ROOT / "Times New Roman.ttf")))
+
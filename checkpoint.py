@@ -0,0 +1,66 @@
+# checkpoint.py
+# 當日報告的檢查點日誌（JSON Lines）：每完成一篇文章就追加一行並 fsync
+# 中途失敗後重跑時，從日誌重建 Markdown 並略過已完成的文章，不會重做已付費的 LLM 工作
+import json
+import os
+import time
+from pathlib import Path
+
+from article_keys import article_keys
+
+CHECKPOINT_DIR = ".cache/checkpoints"
+CHECKPOINT_KEEP_DAYS = 7   # 超過天數的舊日誌在開新日誌時順手刪除
+
+class CheckpointJournal:
+    def __init__(self, report_date: str, directory=CHECKPOINT_DIR):
+        self.directory = Path(directory)
+        self.path = self.directory / f"journal_{report_date}.jsonl"
+        self.entries = []
+        self._done = set()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 寫到一半就中斷的最後一行，直接忽略
+                    continue
+                self.entries.append(entry)
+                self._done.update(entry.get("keys", []))
+
+    def is_done(self, article: dict) -> bool:
+        return any(k in self._done for k in article_keys(article))
+
+    def record(self, article: dict, domain: str, report: str):
+        keys = article_keys(article)
+        entry = {
+            "keys": keys,
+            "title": article.get("title", ""),
+            "source": article.get("source", ""),
+            "domain": domain,
+            "report": report,
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries.append(entry)
+        self._done.update(keys)
+
+    def reset(self):
+        """捨棄當日日誌（重新開始），並清掉過舊的日誌"""
+        self.path.unlink(missing_ok=True)
+        self.entries = []
+        self._done = set()
+        cutoff = time.time() - CHECKPOINT_KEEP_DAYS * 86400
+        for old in self.directory.glob("journal_*.jsonl"):
+            try:
+                if old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except OSError:
+                continue
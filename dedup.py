@@ -0,0 +1,129 @@
+# dedup.py
+# 跨來源去重：同一篇論文常同時出現在 PubMed、bioRxiv/medRxiv 與期刊自己的 RSS
+# 精確鍵（正規化 URL / DOI / 標題雜湊）用雜湊表合併，近似標題用 MinHash + LSH 分桶，
+# 全程與文章數量呈線性關係，不做兩兩比對。
+import hashlib
+import random
+
+from article_keys import article_keys, extract_doi, normalize_title
+
+MINHASH_PERMUTATIONS = 32     # 每個標題的 MinHash 簽章長度
+LSH_BANDS = 8                 # 32 = 8 bands x 4 rows，約 Jaccard 0.6 以上才會落在同一桶
+TITLE_SIMILARITY = 0.8        # 同桶候選需再確認的 Jaccard 門檻
+MIN_TITLE_TOKENS = 4          # 太短的標題只做精確比對，避免誤合併
+MAX_BUCKET_REPS = 16          # 每個桶只保留最近 K 個群的代表，樣板化標題擠在同一桶時仍維持線性時間
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20250925)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+
+def _shingles(title: str) -> set:
+    """英文用單字 + 相鄰雙字；無空白的中日文標題用 3 字元片段"""
+    norm = normalize_title(title)
+    words = norm.split()
+    if len(words) >= MIN_TITLE_TOKENS:
+        return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    compact = norm.replace(" ", "")
+    if len(words) <= 1 and len(compact) >= 12:
+        return {compact[i:i + 3] for i in range(len(compact) - 2)}
+    return set()
+
+def _minhash(shingles: set) -> list:
+    hashed = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingles]
+    return [min((a * h + b) % _PRIME for h in hashed) for a, b in _PERMS]
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            # 以較早出現的文章當根，輸出順序才會穩定
+            if rj < ri:
+                ri, rj = rj, ri
+            self.parent[rj] = ri
+
+def _representative_rank(article: dict, idx: int):
+    # 優先保留有 DOI、摘要較完整、來源順序較前面的版本
+    has_doi = bool(extract_doi(article.get("url", ""), article.get("summary", "")))
+    return (not has_doi, -len(article.get("summary", "") or ""), idx)
+
+def dedup_articles(articles: list) -> tuple:
+    """
+    將同一篇文章的多個版本分群，每群保留一篇代表。
+    回傳 (代表文章清單, 被合併掉的篇數)；代表文章依該群第一次出現的順序排列，
+    並在 "duplicates" 欄位附上同群的其他版本。
+    """
+    n = len(articles)
+    uf = _UnionFind(n)
+
+    # 1) 精確鍵：URL / DOI / 標題雜湊
+    owner = {}
+    for i, article in enumerate(articles):
+        for key in article_keys(article):
+            j = owner.setdefault(key, i)
+            if j != i:
+                uf.union(i, j)
+
+    # 2) 近似標題：MinHash 簽章切成 band，同一 band 值的才互相確認。
+    #    完整簽章相同的標題先直接確認；每個桶記錄 {群的根: 該群在桶中的代表成員}（依加入先後），
+    #    同一群只比對一次，且最多保留 MAX_BUCKET_REPS 個最近的群，每篇的比對次數有上限
+    buckets = {}
+    by_signature = {}
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    shingle_sets = [None] * n
+    for i, article in enumerate(articles):
+        sh = _shingles(article.get("title", ""))
+        if not sh:
+            continue
+        shingle_sets[i] = sh
+        sig = _minhash(sh)
+        j = by_signature.setdefault(tuple(sig), i)
+        if j != i and uf.find(i) != uf.find(j) and _jaccard(sh, shingle_sets[j]) >= TITLE_SIMILARITY:
+            uf.union(i, j)
+        for band in range(LSH_BANDS):
+            key = (band, tuple(sig[band * rows:(band + 1) * rows]))
+            bucket = buckets.setdefault(key, {})
+            merged = False
+            for j in list(bucket.values()):
+                if uf.find(i) != uf.find(j) and _jaccard(sh, shingle_sets[j]) >= TITLE_SIMILARITY:
+                    uf.union(i, j)
+                    merged = True
+            if merged:
+                # 合併後依新的根重新整理，每群只留一個代表（保持先後順序）
+                refreshed = {}
+                for j in bucket.values():
+                    refreshed.setdefault(uf.find(j), j)
+                bucket = buckets[key] = refreshed
+            root = uf.find(i)
+            bucket.pop(root, None)
+            bucket[root] = i          # 移到最後（最近）
+            if len(bucket) > MAX_BUCKET_REPS:
+                del bucket[next(iter(bucket))]
+
+    # 3) 每群挑一篇代表
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(uf.find(i), []).append(i)
+
+    representatives = []
+    for members in clusters.values():
+        best = min(members, key=lambda i: _representative_rank(articles[i], i))
+        rep = articles[best]
+        rep["duplicates"] = [articles[i] for i in members if i != best]
+        representatives.append(rep)
+
+    return representatives, n - len(representatives)
@@ -0,0 +1,236 @@
+# embed_classifier.py
+# 向量式領域分類（選用，需要 numpy）：
+# 把標題 + 摘要轉成 hashing TF-IDF 向量（英文單字 / 雙字詞、中文字元雙連字），
+# 以 DOMAIN_MAP 的關鍵字當種子建立各領域中心向量，再用批次中信心夠高的文章自我修正一輪，
+# 最後以餘弦相似度指派領域；相似度太低歸為 other。
+# 文章的 TF 向量以內容雜湊存在 SQLite（.cache/embeddings.sqlite），IDF 依每批文件計算。
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # 沒有 numpy 時 available() 回傳 False，main.py 改用關鍵字規則
+    np = None
+
+EMBED_DIM = 1 << 14                 # hashing 向量維度
+EMBED_VERSION = "hash-tfidf-v1"     # 特徵算法變更時一併修改，舊快取自動失效
+EMBED_CACHE_FILE = ".cache/embeddings.sqlite"
+MIN_SIMILARITY = 0.04               # 與所有領域中心的相似度都低於此值 → other
+SELF_TRAIN_MIN_SIMILARITY = 0.08    # 自我修正時只採用相似度高於此值的文章
+SELF_TRAIN_WEIGHT = 1.0             # 批次文章平均向量加回中心向量的權重
+
+# 各領域的補充種子詞彙（領域名稱不在這裡時只用 DOMAIN_MAP 關鍵字）
+DOMAIN_DESCRIPTIONS = {
+    "signal": "sensor sensors sensing electrode electrodes patch skin monitoring physiological heart rate "
+              "pulse blood pressure photoplethysmography electrocardiogram electromyography respiration "
+              "flexible stretchable electronics smartwatch wrist continuous measurement glucose sweat temperature",
+    "extracellular": "vesicles exosome cell-free dna plasma blood urine biomarker biomarkers tumor-derived "
+                     "fragment methylation isolation detection early cancer relapse residual disease",
+    "neuro": "neuron neurons neural cortex cortical hippocampus hippocampal synapse synaptic memory learning "
+             "cognition cognitive sleep depression anxiety schizophrenia dopamine stimulation parkinson "
+             "alzheimer stroke emotion behavior behaviour mice optogenetic brain organoids",
+    "ai": "model models neural network networks transformer language model training dataset prediction "
+          "predict classification segmentation algorithm automated self-supervised federated app virtual "
+          "video remote data explainable images radiology pathology",
+    "industry": "company companies startup funding investment acquisition merger deal market regulation "
+                "approval clearance guidance reimbursement payers policy manufacturers pharmaceutical "
+                "layoffs venture billion million submission",
+    "basicbio": "cell cells gene genes protein proteins dna rna chromatin transcription expression crispr "
+                "mitochondrial enzyme structure cryo-em receptor signalling signaling pathway mouse zebrafish "
+                "microbiome metabolic lipid ageing aging differentiation regeneration macrophages",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[-+][a-z0-9]+)*")
+_CJK_RUN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or that the their this to "
+    "was were which with we our using based via new study between after among can than these".split()
+)
+
+def available() -> bool:
+    return np is not None
+
+def _features(text: str) -> list:
+    text = text.lower()
+    words = [w for w in _WORD_RE.findall(text) if len(w) > 1 and w not in _STOPWORDS]
+    feats = list(words)
+    feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for run in _CJK_RUN_RE.findall(text):
+        feats += [run[i:i + 2] for i in range(len(run) - 1)] or [run]
+    return feats
+
+def embed_sparse(text: str) -> tuple:
+    """回傳 (索引, 權重)：hashing trick + 次線性 TF，已做 L2 正規化"""
+    counts = {}
+    for feat in _features(text):
+        h = zlib.crc32(feat.encode("utf-8"))
+        idx = h & (EMBED_DIM - 1)
+        sign = -1.0 if h & 0x80000000 else 1.0   # 帶正負號的 hashing 讓碰撞互相抵銷
+        counts[idx] = counts.get(idx, 0.0) + sign
+    items = [(i, math.copysign(1 + math.log(abs(c)), c)) for i, c in counts.items() if c]
+    norm = math.sqrt(sum(v * v for _, v in items)) or 1.0
+    idx = np.fromiter((i for i, _ in items), dtype=np.int32, count=len(items))
+    val = np.fromiter((v / norm for _, v in items), dtype=np.float32, count=len(items))
+    return idx, val
+
+def article_text(article: dict) -> str:
+    return f"{article.get('title', '') or ''}\n{article.get('summary', '') or ''}"
+
+# ===== 向量快取（以內容雜湊為鍵） =====
+class EmbeddingCache:
+    def __init__(self, path=EMBED_CACHE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, idx BLOB, val BLOB)")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha1(f"{EMBED_VERSION}\n{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list) -> dict:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, idx, val FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, idx, val in rows:
+                    found[key] = (np.frombuffer(idx, dtype=np.int32), np.frombuffer(val, dtype=np.float32))
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: dict):
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, idx, val) VALUES (?, ?, ?)",
+                [(k, idx.tobytes(), val.tobytes()) for k, (idx, val) in items.items()],
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# ===== 批次稀疏矩陣運算 =====
+def _stack(vectors: list) -> tuple:
+    """把多個稀疏向量接成 (doc_ids, idx, val)，之後用 bincount 一次算完所有內積"""
+    lengths = np.fromiter((len(i) for i, _ in vectors), dtype=np.int64, count=len(vectors))
+    doc_ids = np.repeat(np.arange(len(vectors)), lengths)
+    if len(doc_ids) == 0:
+        return doc_ids, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    idx = np.concatenate([i for i, _ in vectors])
+    val = np.concatenate([v for _, v in vectors])
+    return doc_ids, idx, val
+
+def _idf_weight(doc_ids, idx, val, n_docs: int, extra_df=None):
+    """以批次文件頻率計算 IDF 並重新正規化"""
+    df = np.bincount(idx, minlength=EMBED_DIM).astype(np.float32)
+    if extra_df is not None:
+        df += extra_df
+    idf = np.log((1 + n_docs) / (1 + df)) + 1
+    val = val * idf[idx]
+    norms = np.sqrt(np.bincount(doc_ids, weights=val * val, minlength=n_docs)) if len(doc_ids) else np.zeros(n_docs)
+    norms[norms == 0] = 1
+    return val / norms[doc_ids], idf
+
+class CentroidClassifier:
+    """
+    classify_many(articles)：批次指派領域，回傳與輸入同順序的領域名稱清單。
+    """
+
+    def __init__(self, domain_map: dict, cache: EmbeddingCache = None, min_similarity=MIN_SIMILARITY):
+        if np is None:
+            raise RuntimeError("embed_classifier 需要 numpy")
+        self.domains = list(domain_map)
+        self.cache = cache
+        self.min_similarity = min_similarity
+        # 每個領域的種子：關鍵字清單 + 補充詞彙整體當成一份文件
+        self._seeds = [embed_sparse(" \n".join(kws) + "\n" + DOMAIN_DESCRIPTIONS.get(d, ""))
+                       for d, kws in domain_map.items()]
+
+    def _embed_all(self, texts: list) -> list:
+        if self.cache is None:
+            return [embed_sparse(t) for t in texts]
+        keys = [EmbeddingCache.make_key(t) for t in texts]
+        found = self.cache.get_many(keys)
+        fresh = {}
+        vectors = []
+        for key, text in zip(keys, texts):
+            vec = found.get(key) or fresh.get(key)
+            if vec is None:
+                vec = fresh[key] = embed_sparse(text)
+            vectors.append(vec)
+        if fresh:
+            self.cache.put_many(fresh)
+        return vectors
+
+    def _centroids(self, idf, doc_ids=None, idx=None, val=None, labels=None, confident=None):
+        k = len(self.domains)
+        C = np.zeros((k, EMBED_DIM), dtype=np.float32)
+        for j, (sidx, sval) in enumerate(self._seeds):
+            w = sval * idf[sidx]
+            C[j, sidx] += w / (np.linalg.norm(w) or 1)
+        if labels is not None and confident.any():
+            mask = confident[doc_ids]
+            rows = labels[doc_ids[mask]]
+            acc = np.zeros_like(C)
+            np.add.at(acc, (rows, idx[mask]), val[mask])
+            counts = np.bincount(labels[confident], minlength=k).astype(np.float32)
+            counts[counts == 0] = 1
+            C += SELF_TRAIN_WEIGHT * acc / counts[:, None]
+        norms = np.linalg.norm(C, axis=1)
+        norms[norms == 0] = 1
+        return C / norms[:, None]
+
+    def _similarities(self, C, doc_ids, idx, val, n_docs):
+        return np.vstack([np.bincount(doc_ids, weights=C[j, idx] * val, minlength=n_docs)
+                          for j in range(len(self.domains))])
+
+    def classify_many(self, articles: list, rule_domains: list = None) -> list:
+        """
+        rule_domains：關鍵字規則的分類結果（可省略）。有提供時以規則已分類的文章修正領域中心，
+        再對所有文章（包含規則歸為 other 的）以相似度重新指派。
+        """
+        if not articles:
+            return []
+        n = len(articles)
+        doc_ids, idx, val = _stack(self._embed_all([article_text(a) for a in articles]))
+        # 種子文件也算進文件頻率，避免單篇批次時 IDF 全部相同
+        seed_df = np.zeros(EMBED_DIM, dtype=np.float32)
+        for sidx, _ in self._seeds:
+            seed_df[sidx] += 1
+        val, idf = _idf_weight(doc_ids, idx, val, n + len(self._seeds), extra_df=seed_df)
+
+        sims = self._similarities(self._centroids(idf), doc_ids, idx, val, n)
+        if rule_domains is not None:
+            index = {d: j for j, d in enumerate(self.domains)}
+            labels = np.array([index.get(d, 0) for d in rule_domains], dtype=np.int64)
+            confident = np.array([d in index for d in rule_domains], dtype=bool)
+        else:
+            labels = sims.argmax(axis=0)
+            confident = sims.max(axis=0) >= SELF_TRAIN_MIN_SIMILARITY
+        if confident.any():
+            C = self._centroids(idf, doc_ids, idx, val, labels, confident)
+            sims = self._similarities(C, doc_ids, idx, val, n)
+        # 規則標籤只用來修正中心；最終一律依相似度指派（規則為 other 的文章不會被當成第一個領域）
+        labels = sims.argmax(axis=0)
+
+        best = sims.max(axis=0)
+        return [self.domains[j] if s >= self.min_similarity else "other" for j, s in zip(labels, best)]
+
+    def assign(self, articles: list):
+        """直接改寫 article["domain"]（原本的 domain 視為規則分類結果）"""
+        rule_domains = [a.get("domain", "other") for a in articles]
+        for article, domain in zip(articles, self.classify_many(articles, rule_domains)):
+            article["domain"] = domain
@@ -0,0 +1,118 @@
+# feed_parser.py
+# 以 lxml iterparse 串流解析 RSS 2.0 / RSS 1.0 (RDF, dc:date) / Atom
+# 逐一處理 <item> / <entry>，處理完立即清掉元素，不建整棵樹；
+# 給定 since 時，連續遇到夠多篇早於 since 的文章就提早停止（feed 通常由新到舊排列）
+import io
+from datetime import datetime
+
+from lxml import etree
+
+EARLY_STOP_AFTER = 10   # 連續幾篇早於時間窗就停止解析（容忍少量順序不一致）
+
+def _local(tag) -> str:
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+def _text(el) -> str:
+    return "".join(el.itertext()).strip() if el is not None else ""
+
+def _atom_link(entry) -> str:
+    fallback = ""
+    for child in entry:
+        if _local(child.tag) != "link":
+            continue
+        href = child.get("href")
+        if not href:
+            # RSS 的 <link> 是文字內容
+            text = _text(child)
+            if text:
+                return text
+            continue
+        rel = child.get("rel", "alternate")
+        if rel == "alternate":
+            return href
+        fallback = fallback or href
+    return fallback
+
+def _first(fields: dict, *names):
+    # lxml 元素沒有子元素時布林值為 False，不能用 or 串接
+    for name in names:
+        el = fields.get(name)
+        if el is not None:
+            return el
+    return None
+
+def _item_fields(item) -> dict:
+    """取出單篇文章的原始欄位（只看直接子元素，不會誤抓 <source><title> 之類的巢狀標籤）"""
+    fields = {}
+    for child in item:
+        name = _local(child.tag)
+        if name and name not in fields:
+            fields[name] = child
+    return {
+        "title": _text(fields.get("title")),
+        "link": _atom_link(item),
+        "description": _text(_first(fields, "description", "summary", "encoded", "content")),
+        # RSS 2.0: pubDate；RSS 1.0: dc:date；Atom: published / updated
+        "date": _text(_first(fields, "pubDate", "date", "published", "updated")),
+    }
+
+def _release(el):
+    # 清掉已處理的元素與前面的兄弟節點，讓記憶體維持在單篇文章的大小
+    el.clear()
+    parent = el.getparent()
+    if parent is not None:
+        while el.getprevious() is not None:
+            del parent[0]
+
+def iter_feed_items(data: bytes):
+    """逐篇 yield {title, link, description, date}（皆為原始字串）"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    context = etree.iterparse(
+        io.BytesIO(data), events=("end",), tag=("{*}item", "{*}entry"),
+        recover=True, resolve_entities=False, no_network=True, huge_tree=True,
+    )
+    try:
+        for _, el in context:
+            fields = _item_fields(el)
+            _release(el)
+            yield fields
+    except etree.XMLSyntaxError:
+        # recover 模式仍無法繼續時，保留已解析的部分
+        return
+    finally:
+        del context
+
+def parse_items(data: bytes, parse_date, since: datetime = None) -> list:
+    """
+    解析 feed 並轉成文章 dict（title / summary / publish_date / url）。
+    parse_date 為日期字串 → datetime 的函式；since 為時間窗起點（date），
+    連續 EARLY_STOP_AFTER 篇早於 since 即停止。
+    """
+    articles = []
+    older_streak = 0
+    for fields in iter_feed_items(data):
+        link = fields["link"]
+        if not link or not fields["date"]:
+            continue
+        try:
+            pub_dt = parse_date(fields["date"])
+        except Exception:
+            continue
+
+        if since is not None and pub_dt.date() < since:
+            older_streak += 1
+            if older_streak >= EARLY_STOP_AFTER:
+                break
+            continue
+        older_streak = 0
+
+        articles.append({
+            "title": fields["title"] or "(無標題)",
+            "summary": fields["description"],
+            "publish_date": pub_dt.isoformat(),
+            "url": link
+        })
+    return articles
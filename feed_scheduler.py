@@ -0,0 +1,327 @@
+# feed_scheduler.py
+# 依來源更新頻率調整抓取時機的排程器：
+# - 每個 feed 的發文頻率（新文章間隔的移動平均）、延遲、錯誤紀錄存在 SQLite（.cache/feed_health.sqlite）
+# - 下次抓取時間 = 平均發文間隔 × POLL_FACTOR（限制在 MIN / MAX 之間）
+# - 斷路器：連續失敗 BREAKER_THRESHOLD 次就暫停該來源，冷卻時間指數增加；冷卻後先試抓一次（half-open）
+# - daemon 模式：常駐執行，只抓到期的來源（沿用 fetch_feeds_concurrently 的並行與每主機限制），文章存入 article_archive
+#
+# 用法：
+#   python feed_scheduler.py status          # 列出各來源狀態
+#   python feed_scheduler.py poll            # 抓一次所有到期的來源
+#   python feed_scheduler.py daemon          # 常駐輪詢（Ctrl+C 結束）
+import argparse
+import sqlite3
+import statistics
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from article_archive import ArticleArchive
+from fetch_articles import (
+    fetch_feed_items, fetch_feeds_concurrently, load_urls, save_feed_cache,
+    FETCH_CONCURRENCY, FETCH_PER_HOST, URLS_FILE,
+)
+
+HEALTH_DB = ".cache/feed_health.sqlite"
+
+# ===== 排程設定（秒） =====
+DEFAULT_POLL_INTERVAL = 6 * 3600   # 還不知道發文頻率時
+MIN_POLL_INTERVAL = 15 * 60
+MAX_POLL_INTERVAL = 24 * 3600
+POLL_FACTOR = 0.5                  # 平均發文間隔的幾倍抓一次
+INTERVAL_EWMA = 0.3                # 發文間隔 / 延遲的移動平均權重（越大越偏重最新一次）
+BREAKER_THRESHOLD = 3              # 連續失敗幾次打開斷路器
+BREAKER_COOLDOWN = 3600            # 第一次打開時的冷卻時間，之後每次失敗加倍
+BREAKER_MAX_COOLDOWN = 7 * 24 * 3600
+POLL_LOG_KEEP = 50                 # 每個來源保留的抓取紀錄筆數
+DAEMON_MAX_SLEEP = 300
+
+def check_feed_url(url: str) -> str:
+    """回傳網址看起來有問題的原因；正常回傳空字串"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        return "不是 http(s) 網址"
+    if not parts.hostname:
+        return "缺少主機名稱"
+    if "=" in parts.path and not parts.query:
+        return "路徑中有 '=' 但沒有 '?'，查詢字串可能少了問號"
+    return ""
+
+def _publish_interval(items: list, after: float = None) -> float:
+    """
+    相鄰文章發表時間間隔的中位數（秒）；不足兩個時間點回傳 None。
+    after 為上次看到的最新文章時間：只取比它新的文章，並把它當成第一個時間點。
+    抓取時只保留最近兩天的文章（fetch_today_from_rss），若直接取視窗內的間隔，發文慢的來源會被低估；
+    接在上次最新文章之後計算，跨越多次抓取的長間隔也會算進來
+    """
+    stamps = []
+    for item in items:
+        try:
+            ts = datetime.fromisoformat(item["publish_date"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+        if after is None or ts > after:
+            stamps.append(ts)
+    if after is not None and stamps:
+        stamps.append(after)
+    stamps.sort()
+    gaps = [b - a for a, b in zip(stamps, stamps[1:]) if b > a]
+    return statistics.median(gaps) if gaps else None
+
+def _newest(items: list) -> float:
+    newest = None
+    for item in items:
+        try:
+            ts = datetime.fromisoformat(item["publish_date"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+        newest = ts if newest is None else max(newest, ts)
+    return newest
+
+class FeedHealthStore:
+    """
+    feeds：每個來源一列（狀態、下次抓取時間、發文間隔 / 延遲移動平均、連續失敗次數）
+    poll_log：最近幾次抓取的結果，方便查看錯誤歷史
+    """
+
+    def __init__(self, path=HEALTH_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            " url TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL DEFAULT 'closed',"   # closed / open / half_open
+            " next_poll REAL NOT NULL DEFAULT 0,"
+            " last_poll REAL, last_success REAL, last_item REAL,"
+            " avg_interval REAL, avg_latency REAL,"
+            " failures INTEGER NOT NULL DEFAULT 0,"
+            " polls INTEGER NOT NULL DEFAULT 0, errors INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT);"
+            "CREATE TABLE IF NOT EXISTS poll_log ("
+            " url TEXT NOT NULL, ts REAL NOT NULL, latency REAL, ok INTEGER NOT NULL,"
+            " items INTEGER, new_items INTEGER, error TEXT);"
+            "CREATE INDEX IF NOT EXISTS idx_poll_log_url ON poll_log(url, ts);"
+            "CREATE INDEX IF NOT EXISTS idx_feeds_next ON feeds(next_poll);"
+        )
+        self.conn.commit()
+
+    def get(self, url: str):
+        with self._lock:
+            return self.conn.execute("SELECT * FROM feeds WHERE url = ?", (url,)).fetchone()
+
+    def rows(self) -> list:
+        with self._lock:
+            return self.conn.execute("SELECT * FROM feeds ORDER BY next_poll").fetchall()
+
+    def _ensure(self, url: str):
+        self.conn.execute("INSERT OR IGNORE INTO feeds (url) VALUES (?)", (url,))
+
+    def _log(self, url, now, latency, ok, items=None, new_items=None, error=None):
+        self.conn.execute("INSERT INTO poll_log VALUES (?, ?, ?, ?, ?, ?, ?)",
+                          (url, now, latency, int(ok), items, new_items, error))
+        self.conn.execute(
+            "DELETE FROM poll_log WHERE url = ? AND ts NOT IN "
+            "(SELECT ts FROM poll_log WHERE url = ? ORDER BY ts DESC LIMIT ?)",
+            (url, url, POLL_LOG_KEEP),
+        )
+
+    @staticmethod
+    def _ewma(old, new):
+        if new is None:
+            return old
+        return new if old is None else (1 - INTERVAL_EWMA) * old + INTERVAL_EWMA * new
+
+    def record_success(self, url: str, latency: float, items: list, now: float = None) -> int:
+        """記錄一次成功抓取，回傳新文章數（發表時間晚於上次看到的最新文章）"""
+        now = now or time.time()
+        with self._lock:
+            self._ensure(url)
+            row = self.conn.execute("SELECT * FROM feeds WHERE url = ?", (url,)).fetchone()
+            last_item = row["last_item"]
+            new_items = sum(
+                1 for item in items
+                if last_item is None or (_newest([item]) or 0) > last_item
+            )
+            newest = _newest(items)
+            avg_interval = self._ewma(row["avg_interval"], _publish_interval(items, last_item))
+            avg_latency = self._ewma(row["avg_latency"], latency)
+            next_poll = now + self._poll_interval(avg_interval)
+            self.conn.execute(
+                "UPDATE feeds SET state = 'closed', failures = 0, next_poll = ?, last_poll = ?,"
+                " last_success = ?, last_item = ?, avg_interval = ?, avg_latency = ?, polls = polls + 1"
+                " WHERE url = ?",
+                (next_poll, now, now, max(filter(None, (last_item, newest)), default=None),
+                 avg_interval, avg_latency, url),
+            )
+            self._log(url, now, latency, True, len(items), new_items)
+            self.conn.commit()
+        return new_items
+
+    def record_failure(self, url: str, latency: float, error, now: float = None):
+        now = now or time.time()
+        with self._lock:
+            self._ensure(url)
+            row = self.conn.execute("SELECT failures, avg_interval FROM feeds WHERE url = ?", (url,)).fetchone()
+            failures = row["failures"] + 1
+            if failures >= BREAKER_THRESHOLD:
+                state = "open"
+                cooldown = min(BREAKER_MAX_COOLDOWN, BREAKER_COOLDOWN * 2 ** (failures - BREAKER_THRESHOLD))
+                next_poll = now + cooldown
+            else:
+                state = "closed"
+                next_poll = now + min(self._poll_interval(row["avg_interval"]), BREAKER_COOLDOWN)
+            message = f"{type(error).__name__}: {error}"[:500]
+            self.conn.execute(
+                "UPDATE feeds SET state = ?, failures = ?, next_poll = ?, last_poll = ?,"
+                " polls = polls + 1, errors = errors + 1, last_error = ? WHERE url = ?",
+                (state, failures, next_poll, now, message, url),
+            )
+            self._log(url, now, latency, False, error=message)
+            self.conn.commit()
+
+    @staticmethod
+    def _poll_interval(avg_interval) -> float:
+        if avg_interval is None:
+            return DEFAULT_POLL_INTERVAL
+        return max(MIN_POLL_INTERVAL, min(MAX_POLL_INTERVAL, avg_interval * POLL_FACTOR))
+
+    def allow(self, url: str, now: float = None, probe: bool = True) -> bool:
+        """
+        斷路器開啟且仍在冷卻中的來源回傳 False；冷卻結束則轉為 half_open 允許試抓一次。
+        probe=False 時只查詢、不改狀態（dry-run 用）
+        """
+        now = now or time.time()
+        row = self.get(url)
+        if row is None or row["state"] != "open":
+            return True
+        if now < row["next_poll"]:
+            return False
+        if not probe:
+            return True
+        with self._lock:
+            self.conn.execute("UPDATE feeds SET state = 'half_open' WHERE url = ?", (url,))
+            self.conn.commit()
+        return True
+
+    def due(self, urls: list, now: float = None) -> list:
+        """到期（或從未抓過）的來源，依到期時間排序"""
+        now = now or time.time()
+        with self._lock:
+            known = {r["url"]: r["next_poll"] for r in self.conn.execute("SELECT url, next_poll FROM feeds")}
+        due = [u for u in urls if known.get(u, 0) <= now]
+        return sorted(due, key=lambda u: known.get(u, 0))
+
+    def next_due_in(self, urls: list, now: float = None) -> float:
+        now = now or time.time()
+        with self._lock:
+            known = {r["url"]: r["next_poll"] for r in self.conn.execute("SELECT url, next_poll FROM feeds")}
+        return max(0.0, min((known.get(u, 0) for u in urls), default=now) - now)
+
+    def wrap(self, fetch):
+        """包裝抓取函式：自動記錄延遲與成功 / 失敗（給 fetch_feeds_concurrently 使用）"""
+        def timed(url):
+            t0 = time.perf_counter()
+            try:
+                items = fetch(url)
+            except Exception as e:
+                self.record_failure(url, time.perf_counter() - t0, e)
+                raise
+            self.record_success(url, time.perf_counter() - t0, items)
+            return items
+        return timed
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+# ===== 輪詢 =====
+def poll_once(store: FeedHealthStore, urls: list, fetch=None, on_items=None,
+              max_workers=FETCH_CONCURRENCY, per_host=FETCH_PER_HOST) -> dict:
+    """抓一次所有到期且斷路器允許的來源；on_items(url, items) 處理抓到的文章"""
+    now = time.time()
+    due = [u for u in store.due(urls, now) if store.allow(u, now)]
+    summary = {"due": len(due), "ok": 0, "failed": 0, "items": 0}
+    if not due:
+        return summary
+    fetch = store.wrap(fetch or fetch_feed_items)
+    for url, items, err in fetch_feeds_concurrently(due, fetch=fetch, max_workers=max_workers, per_host=per_host):
+        if err is not None:
+            summary["failed"] += 1
+            print(f"  ❌ {url} → {err}")
+            continue
+        summary["ok"] += 1
+        summary["items"] += len(items)
+        if on_items is not None:
+            on_items(url, items)
+    save_feed_cache()
+    return summary
+
+def run_daemon(store: FeedHealthStore, urls: list, fetch=None, on_items=None, max_cycles=None):
+    """常駐輪詢：抓完到期的來源後，睡到下一個來源到期（最多 DAEMON_MAX_SLEEP 秒）"""
+    cycles = 0
+    print(f"🛰️ 排程器啟動：{len(urls)} 個來源")
+    try:
+        while max_cycles is None or cycles < max_cycles:
+            summary = poll_once(store, urls, fetch=fetch, on_items=on_items)
+            cycles += 1
+            if summary["due"]:
+                print(f"[{datetime.now():%H:%M:%S}] 🔄 到期 {summary['due']}：成功 {summary['ok']}、"
+                      f"失敗 {summary['failed']}、文章 {summary['items']}")
+            wait = min(DAEMON_MAX_SLEEP, max(1.0, store.next_due_in(urls)))
+            if max_cycles is None or cycles < max_cycles:
+                time.sleep(wait)
+    except KeyboardInterrupt:
+        print("\n👋 排程器結束")
+
+def print_status(store: FeedHealthStore, urls: list):
+    rows = {r["url"]: r for r in store.rows()}
+    now = time.time()
+    print(f"{'狀態':<9} {'失敗':>4} {'間隔(h)':>8} {'延遲(s)':>8} {'下次(分)':>9}  來源")
+    for url in urls:
+        row = rows.get(url)
+        problem = check_feed_url(url)
+        if row is None:
+            print(f"{'new':<9} {'':>4} {'':>8} {'':>8} {'':>9}  {url}")
+        else:
+            interval = f"{row['avg_interval'] / 3600:.1f}" if row["avg_interval"] else "-"
+            latency = f"{row['avg_latency']:.2f}" if row["avg_latency"] is not None else "-"
+            print(f"{row['state']:<9} {row['failures']:>4} {interval:>8} {latency:>8} "
+                  f"{max(0, row['next_poll'] - now) / 60:>9.0f}  {url}")
+            if row["last_error"] and row["failures"]:
+                print(f"{'':>44}⚠️ {row['last_error'][:100]}")
+        if problem:
+            print(f"{'':>44}⚠️ 網址格式：{problem}")
+
+def main():
+    ap = argparse.ArgumentParser(description="RSS 來源排程器")
+    ap.add_argument("command", choices=["status", "poll", "daemon"])
+    ap.add_argument("--urls", default=URLS_FILE)
+    ap.add_argument("--db", default=HEALTH_DB)
+    args = ap.parse_args()
+
+    urls = load_urls(args.urls)
+    store = FeedHealthStore(args.db)
+    archive = ArticleArchive()
+
+    def on_items(url, items):
+        # 抓到的文章全部存檔，每日報告 / backfill.py 可直接從存檔取用
+        archive.add_many([dict(item, source=url) for item in items])
+
+    try:
+        if args.command == "status":
+            print_status(store, urls)
+        elif args.command == "poll":
+            print(poll_once(store, urls, on_items=on_items))
+        else:
+            run_daemon(store, urls, on_items=on_items)
+    finally:
+        store.close()
+        archive.close()
+
+if __name__ == "__main__":
+    main()
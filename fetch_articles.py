@@ -1,81 +1,289 @@
 # fetch_articles.py (RSS 版本)
+import json
+import os
 import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
-import warnings
-from bs4 import XMLParsedAsHTMLWarning
 
-# 關閉 XML parser 警告
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+from feed_parser import parse_items
+from metrics import metrics
 
 # 共用 session + retry 機制
 session = requests.Session()
 retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
 session.mount("https://", HTTPAdapter(max_retries=retries))
 
+# ===== 並行抓取設定 =====
+FETCH_CONCURRENCY = 8   # 同時抓取的來源數上限（執行緒池大小）
+FETCH_PER_HOST = 2      # 同一主機同時連線數上限，避免對同一出版商爆量請求
+
+# ===== 條件式 GET 快取設定 =====
+USE_FEED_CACHE = True                       # False 則每次都完整下載並解析
+FEED_CACHE_FILE = ".cache/feed_cache.json"  # 以 feed URL 為鍵的 ETag / Last-Modified 快取
+
 # RSS feed URL (Nature Biomedical Engineering)
 RSS_URL = "http://feeds.nature.com/natbiomedeng/rss/current"
 
-# 解析 RSS pubDate
-def parse_rss_date(date_str: str) -> datetime:
-    for fmt in (
-        "%a, %d %b %Y %H:%M:%S %Z",
-        "%a, %d %b %Y %H:%M:%S %z",
-        "%Y-%m-%dT%H:%M:%SZ",
-        "%Y-%m-%dT%H:%M:%S%z",
-        "%Y-%m-%d"  # 有些 <dc:date> 可能只有日期
-    ):
+# ===== 來源清單（main.py / backfill.py / feed_scheduler.py 共用） =====
+URLS_FILE = "urls.txt"   # 一行一個 RSS 網址，順序即來源優先序
+
+def load_urls(path=URLS_FILE) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+# ===== 日期解析：記住每個 feed 上次成功的格式，下一篇先試那個格式 =====
+RSS_DATE_FORMATS = (
+    "%a, %d %b %Y %H:%M:%S %Z",
+    "%a, %d %b %Y %H:%M:%S %z",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d",  # 有些 <dc:date> 可能只有日期
+    "iso",       # Atom / ISO 8601（含毫秒、Z 或 +00:00 時區）
+)
+_feed_date_formats = {}   # feed URL → 上次成功的格式
+
+def _parse_with(date_str: str, fmt: str) -> datetime:
+    if fmt == "iso":
+        return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    dt = datetime.strptime(date_str, fmt)
+    if fmt.endswith("Z"):
+        # 結尾的 Z 是 UTC
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+# 解析 RSS pubDate；給 source 時優先使用該 feed 上次成功的格式
+def parse_rss_date(date_str: str, source: str = None) -> datetime:
+    cached = _feed_date_formats.get(source) if source else None
+    if cached is not None:
         try:
-            return datetime.strptime(date_str, fmt)
+            return _parse_with(date_str, cached)
         except ValueError:
+            pass
+    for fmt in RSS_DATE_FORMATS:
+        if fmt == cached:
             continue
+        try:
+            dt = _parse_with(date_str, fmt)
+        except ValueError:
+            continue
+        if source:
+            _feed_date_formats[source] = fmt
+        return dt
     raise ValueError(f"無法解析日期格式：{date_str}")
 
-# 從 RSS 抓取「當天」文章
-from datetime import timedelta
+# ===== 報告時區 =====
+REPORT_TIMEZONE = None   # 例如 "Asia/Taipei"；None 為執行環境的系統時區
+
+def get_timezone(name=None):
+    name = name or REPORT_TIMEZONE
+    if name:
+        return ZoneInfo(name)
+    return datetime.now().astimezone().tzinfo
+
+def local_day(pub_dt: datetime, tz) -> date:
+    """發表時間在報告時區的日期（沒有時區資訊的時間視為已是報告時區）"""
+    if pub_dt.tzinfo is None:
+        return pub_dt.date()
+    return pub_dt.astimezone(tz).date()
+
+# ===== HTTP 驗證快取（ETag / Last-Modified） =====
+class FeedCache:
+    """
+    以 feed URL 為鍵的磁碟快取：保存 ETag / Last-Modified 與上次解析出的文章。
+    下次抓取時送出 If-None-Match / If-Modified-Since，收到 304 就直接沿用快取，
+    不下載也不重新解析。
+    """
+
+    def __init__(self, path=FEED_CACHE_FILE):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, url):
+        with self._lock:
+            return self._load().get(url)
+
+    def conditional_headers(self, url) -> dict:
+        entry = self.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def covers(self, url, since) -> bool:
+        """快取的文章是否涵蓋 since 之後的範圍（快取時用較晚的 since 提早停止解析就不算）"""
+        entry = self.get(url)
+        if entry is None:
+            return False
+        cached_since = entry.get("since")
+        return cached_since is None or (since is not None and since.isoformat() >= cached_since)
+
+    def put(self, url, etag, last_modified, items, since=None):
+        with self._lock:
+            self._load()[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "items": items,
+                "since": since.isoformat() if since else None,
+            }
+            self._dirty = True
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
 
-def fetch_today_from_rss(rss_url=RSS_URL):
+    def save(self):
+        """寫回磁碟（先寫暫存檔再替換，避免中斷時留下半個 JSON）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+feed_cache = FeedCache()
+
+def save_feed_cache():
+    feed_cache.save()
+
+# 解析整份 RSS / Atom（lxml 串流解析）；since 為時間窗起點，早於它的文章會提早停止解析
+def parse_feed_items(data, since=None, source=None) -> list:
+    return parse_items(data, lambda s: parse_rss_date(s, source), since=since)
+
+# 下載並解析 RSS；若伺服器回 304 則直接使用快取的解析結果
+def fetch_feed_items(rss_url=RSS_URL, since=None) -> list:
     headers = {"User-Agent": "Mozilla/5.0 (compatible; NewsBot/1.0)"}
-    resp = session.get(rss_url, headers=headers, timeout=20)
+    use_cache = USE_FEED_CACHE and feed_cache.covers(rss_url, since)
+    if use_cache:
+        headers.update(feed_cache.conditional_headers(rss_url))
+    with metrics.timer("fetch", source=rss_url):
+        resp = session.get(rss_url, headers=headers, timeout=20)
+
+    if use_cache and resp.status_code == 304:
+        entry = feed_cache.get(rss_url)
+        if entry is not None:
+            feed_cache.record(hit=True)
+            metrics.incr("feed_cache_hit")
+            return entry.get("items", [])
+        # 快取被清掉但伺服器仍回 304：不帶驗證標頭重抓一次
+        with metrics.timer("fetch", source=rss_url):
+            resp = session.get(rss_url, headers={"User-Agent": headers["User-Agent"]}, timeout=20)
+
     resp.raise_for_status()
+    metrics.incr("feed_bytes", len(resp.content))
+    with metrics.timer("parse", source=rss_url):
+        items = parse_feed_items(resp.content, since=since, source=rss_url)
+    if USE_FEED_CACHE:
+        feed_cache.record(hit=False)
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            feed_cache.put(rss_url, etag, last_modified, items, since)
+    return items
 
-    soup = BeautifulSoup(resp.text, "xml")
-    items = soup.find_all("item")
-    
-    # 改用當地時間（台北），並允許昨天+今天
-    today = datetime.now().date()
-    yesterday = today - timedelta(days=1)
+# 從 RSS 抓取指定日期區間（報告時區，含頭尾）的文章
+def fetch_window(rss_url, start: date, end: date, tz=None) -> list:
+    tz = get_timezone(tz) if tz is None or isinstance(tz, str) else tz
+    # 提早停止的界線多留一天，避免時區差造成邊界上的文章被略過
+    items = fetch_feed_items(rss_url, since=start - timedelta(days=1))
 
     articles = []
     for item in items:
-        link = item.find("link").get_text(strip=True) if item.find("link") else None
-        title = item.find("title").get_text(strip=True) if item.find("title") else "(無標題)"
-        description = item.find("description").get_text(strip=True) if item.find("description") else ""
-        pub_date_tag = item.find("pubDate") or item.find("dc:date")
-
-        if not link or not pub_date_tag:
-            continue
-
         try:
-            pub_dt = parse_rss_date(pub_date_tag.get_text(strip=True))
-            # 允許昨天或今天
-            if pub_dt.date() in (today, yesterday):
-                articles.append({
-                    "title": title,
-                    "summary": description,
-                    "publish_date": pub_dt.isoformat(),
-                    "url": link
-                })
-        except Exception:
+            pub_dt = datetime.fromisoformat(item["publish_date"])
+        except (KeyError, ValueError):
             continue
-
+        if start <= local_day(pub_dt, tz) <= end:
+            articles.append(dict(item))
     return articles
 
+# 從 RSS 抓取「當天」文章（報告時區的昨天 + 今天）
+def fetch_today_from_rss(rss_url=RSS_URL, tz=None):
+    tz = get_timezone(tz) if tz is None or isinstance(tz, str) else tz
+    today = datetime.now(tz).date()
+    return fetch_window(rss_url, today - timedelta(days=1), today, tz)
+
+
+# ===== 並行抓取多個來源 =====
+def _host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+def _safe_fetch(fetch, url):
+    try:
+        return fetch(url), None
+    except Exception as e:
+        return [], e
+
+def fetch_feeds_concurrently(urls, fetch=None, max_workers=FETCH_CONCURRENCY, per_host=FETCH_PER_HOST):
+    """
+    以有界執行緒池並行抓取多個 RSS 來源，並限制每個主機的同時連線數。
+    依 urls 原始順序逐一 yield (url, articles, error)；總耗時取決於最慢的來源，而非所有來源加總。
+    """
+    fetch = fetch or fetch_today_from_rss
+    urls = list(urls)
+    if not urls:
+        return
+
+    # 依主機分組排隊，每個主機同時最多 per_host 個請求在執行
+    queues = {}
+    for idx, url in enumerate(urls):
+        queues.setdefault(_host_of(url), deque()).append((idx, url))
+
+    results = {}
+    next_idx = 0
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+        def submit_next(host):
+            idx, url = queues[host].popleft()
+            running[pool.submit(_safe_fetch, fetch, url)] = (idx, url, host)
+
+        for host, queue in queues.items():
+            for _ in range(min(max(1, per_host), len(queue))):
+                submit_next(host)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx, url, host = running.pop(fut)
+                articles, err = fut.result()
+                results[idx] = (url, articles, err)
+                if queues[host]:
+                    submit_next(host)
+            # 依原始順序輸出已完成的結果
+            while next_idx in results:
+                yield results.pop(next_idx)
+                next_idx += 1
+
 
 if __name__ == "__main__":
     results = fetch_today_from_rss()
+    save_feed_cache()
     if not results:
         print("今天沒有找到新文章")
     else:
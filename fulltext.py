@@ -0,0 +1,305 @@
+# fulltext.py
+# 全文擷取：RSS 的 description 常常只有一句導言，這裡下載文章頁面並抽出正文
+# - 共用連線池的 requests session，執行緒池並行下載
+# - 每個主機同時連線數上限 + 兩次請求間隔（robots.txt 有 Crawl-delay 時取較大者）
+# - 串流下載並限制大小，超過上限就截斷，不會把整個大檔讀進記憶體
+# - lxml 正文擷取：移除導覽 / 頁尾等區塊，挑出段落文字最多、連結比例最低的容器
+# - 結果存在 .cache/fulltext，成功的網址不會下載第二次；太短或失敗的結果過了 FULLTEXT_RETRY_TTL 再重試
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib import robotparser
+from urllib.parse import urlsplit
+
+import requests
+from lxml import etree, html
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+from metrics import metrics
+
+# ===== 全文擷取設定 =====
+FULLTEXT_CONCURRENCY = 8          # 同時下載的頁面數上限
+FULLTEXT_PER_HOST = 2             # 同一主機同時連線數上限
+FULLTEXT_CRAWL_DELAY = 1.0        # 同一主機兩次請求的最短間隔（秒）
+FULLTEXT_MAX_BYTES = 2_000_000    # 單頁下載上限，超過就截斷
+FULLTEXT_TIMEOUT = 20
+FULLTEXT_MIN_CHARS = 400          # 擷取結果比這短就視為失敗（多半是付費牆或登入頁）
+FULLTEXT_CACHE_DIR = ".cache/fulltext"
+FULLTEXT_RETRY_TTL = 3 * 24 * 3600   # 太短 / 失敗（付費牆、robots、4xx）的快取保留秒數，之後重新下載
+RESPECT_ROBOTS_TXT = True
+USER_AGENT = "Mozilla/5.0 (compatible; NewsBot/1.0)"
+
+session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=FULLTEXT_CONCURRENCY, pool_maxsize=FULLTEXT_CONCURRENCY,
+    max_retries=Retry(total=2, backoff_factor=1, status_forcelist=[500, 502, 503, 504]),
+)
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
+session.headers["User-Agent"] = USER_AGENT
+
+# ===== 每主機禮貌限制 =====
+class HostThrottle:
+    """每個主機一個 semaphore（同時連線數）與下次可請求的時間（請求間隔）"""
+
+    def __init__(self, per_host=FULLTEXT_PER_HOST, delay=FULLTEXT_CRAWL_DELAY):
+        self.per_host = max(1, per_host)
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next = {}
+        self._delays = {}
+
+    def set_delay(self, host: str, delay: float):
+        with self._lock:
+            self._delays[host] = max(self.delay, delay)
+
+    def acquire(self, host: str):
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        slot.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, 0.0))
+            self._next[host] = start + self._delays.get(host, self.delay)
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, host: str):
+        self._slots[host].release()
+
+throttle = HostThrottle()
+
+_robots = {}
+_robots_lock = threading.Lock()
+
+def _robots_for(url: str):
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    with _robots_lock:
+        if host in _robots:
+            return _robots[host]
+    parser = robotparser.RobotFileParser()
+    throttle.acquire(host)   # robots.txt 也算對該主機的一次請求，同樣受連線數與間隔限制
+    try:
+        resp = session.get(f"{parts.scheme}://{parts.netloc}/robots.txt", timeout=10)
+        if resp.status_code in (401, 403):
+            parser.disallow_all = True   # 與 urllib.robotparser 相同：需要授權視為全部禁止
+        elif resp.status_code >= 400:
+            parser = None   # 沒有 robots.txt：全部允許
+        else:
+            parser.parse(resp.text.splitlines())
+    except requests.RequestException:
+        parser = None
+    finally:
+        throttle.release(host)
+    if parser is not None:
+        delay = parser.crawl_delay(USER_AGENT)
+        if delay:
+            throttle.set_delay(host, float(delay))
+    with _robots_lock:
+        _robots[host] = parser
+    return parser
+
+def allowed_by_robots(url: str) -> bool:
+    if not RESPECT_ROBOTS_TXT:
+        return True
+    parser = _robots_for(url)
+    return parser is None or parser.can_fetch(USER_AGENT, url)
+
+# ===== 磁碟快取 =====
+class FullTextCache:
+    """
+    以網址 sha1 為檔名的 JSON 快取（.cache/fulltext/ab/<sha1>.json）。
+    失敗結果也會記錄，但超過 retry_ttl 秒就視為沒有快取（網站可能改版或拿掉付費牆）
+    """
+
+    def __init__(self, directory=FULLTEXT_CACHE_DIR, retry_ttl=FULLTEXT_RETRY_TTL):
+        self.directory = Path(directory)
+        self.retry_ttl = retry_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()   # get() 會在 enrich_articles 的執行緒池中同時被呼叫
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def get(self, url: str):
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if entry is not None and entry.get("status") != "ok" and time.time() - entry.get("fetched", 0) > self.retry_ttl:
+            entry = None
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, url: str, text: str, status: str):
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "status": status, "text": text, "fetched": time.time()}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+fulltext_cache = FullTextCache()
+
+# ===== 下載 =====
+_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+
+def header_charset(content_type: str):
+    """Content-Type 標頭明確指定的 charset；沒有時回傳 None（requests 會自動補上 ISO-8859-1，不能用）"""
+    m = _CHARSET_RE.search(content_type or "")
+    return m.group(1) if m else None
+
+def download(url: str, max_bytes=FULLTEXT_MAX_BYTES) -> tuple:
+    """串流下載 HTML，回傳 (bytes, 標頭指定的編碼或 None)；非 HTML 回傳 (b"", None)"""
+    host = urlsplit(url).netloc.lower()
+    throttle.acquire(host)
+    try:
+        with session.get(url, timeout=FULLTEXT_TIMEOUT, stream=True) as resp:
+            resp.raise_for_status()
+            ctype = resp.headers.get("Content-Type", "")
+            if ctype and "html" not in ctype:
+                return b"", None
+            chunks, size = [], 0
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    metrics.incr("fulltext_truncated")
+                    break
+            return b"".join(chunks)[:max_bytes], header_charset(ctype)
+    finally:
+        throttle.release(host)
+
+# ===== 正文擷取 =====
+_DROP_TAGS = ("script", "style", "noscript", "nav", "header", "footer", "aside", "form",
+              "button", "svg", "iframe", "figure", "template")
+_BOILERPLATE_HINTS = ("comment", "related", "share", "social", "footer", "header", "nav", "menu",
+                      "sidebar", "advert", "promo", "cookie", "banner", "subscribe", "newsletter", "recommend")
+_BLOCK_TAGS = ("p", "li", "h2", "h3", "blockquote")
+
+def _text(el) -> str:
+    return " ".join("".join(el.itertext()).split())
+
+def _is_boilerplate(el) -> bool:
+    attrs = f"{el.get('class', '')} {el.get('id', '')} {el.get('role', '')}".lower()
+    return any(hint in attrs for hint in _BOILERPLATE_HINTS)
+
+def extract_main_text(data: bytes, encoding: str = None) -> str:
+    """
+    挑出段落文字最多、連結比例最低的容器，回傳其段落（以空行分隔）。
+    encoding 為 None 時由 lxml 依 <meta charset> 判斷
+    """
+    if not data:
+        return ""
+    parser = html.HTMLParser(encoding=encoding, remove_comments=True)
+    try:
+        root = html.fromstring(data, parser=parser)
+    except (etree.ParserError, ValueError):
+        return ""
+
+    etree.strip_elements(root, *_DROP_TAGS, with_tail=False)
+    for el in root.xpath("//*[@class or @id or @role]"):
+        if el.getparent() is not None and el.tag not in ("html", "body", "article", "main") and _is_boilerplate(el):
+            el.drop_tree()
+
+    # 出版商常見的正文容器內的段落加權
+    preferred = set(root.xpath('//*[@itemprop="articleBody"] | //article | //main | //*[@role="main"]'))
+
+    scores = {}
+    for block in root.iter(*_BLOCK_TAGS):
+        text = _text(block)
+        parent = block.getparent()
+        if len(text) < 40 or parent is None:
+            continue
+        link_chars = sum(len(_text(a)) for a in block.iter("a"))
+        score = len(text) * (1 - link_chars / len(text))
+        if preferred and any(el in preferred for el in block.iterancestors()):
+            score *= 1.5
+        scores[parent] = scores.get(parent, 0.0) + score
+        grand = parent.getparent()
+        if grand is not None:
+            # 段落分散在數個 <section> 時，讓共同的上層容器也能勝出
+            scores[grand] = scores.get(grand, 0.0) + score * 0.75
+    if not scores:
+        return ""
+    best = max(scores, key=scores.get)
+
+    paragraphs = []
+    for block in best.iter(*_BLOCK_TAGS):
+        text = _text(block)
+        if len(text) >= 40 and (not paragraphs or paragraphs[-1] != text):
+            paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+# ===== 對外介面 =====
+def fetch_fulltext(url: str) -> str:
+    """回傳擷取到的正文（先查快取）；失敗或太短回傳空字串"""
+    if not url:
+        return ""
+    entry = fulltext_cache.get(url)
+    if entry is not None:
+        metrics.incr("fulltext_cache_hit")
+        return entry.get("text", "")
+
+    if not allowed_by_robots(url):
+        fulltext_cache.put(url, "", "robots")
+        return ""
+    try:
+        with metrics.timer("fulltext", source=urlsplit(url).netloc):
+            data, encoding = download(url)
+        metrics.incr("fulltext_bytes", len(data))
+        text = extract_main_text(data, encoding)
+    except requests.HTTPError as e:
+        # 4xx（付費牆、找不到）視為永久失敗寫入快取；5xx 下次再試
+        status = e.response.status_code if e.response is not None else 0
+        if 400 <= status < 500:
+            fulltext_cache.put(url, "", f"http_{status}")
+        raise
+    status = "ok" if len(text) >= FULLTEXT_MIN_CHARS else "short"
+    if status != "ok":
+        text = ""
+    fulltext_cache.put(url, text, status)
+    return text
+
+def _enrich(article: dict) -> dict:
+    try:
+        text = fetch_fulltext(article.get("url", ""))
+    except Exception as e:
+        print(f"  ⚠️ 全文擷取失敗：{article.get('title','(無標題)')} → {e}")
+        text = ""
+    if len(text) > len(article.get("text") or ""):
+        article["text"] = text
+        article["fulltext"] = True
+    return article
+
+def enrich_articles(articles, max_workers=FULLTEXT_CONCURRENCY):
+    """
+    依輸入順序 yield 補上全文的文章（擷取失敗就保留原本的 RSS 摘要）。
+    articles 可以是 generator：最多同時保留 max_workers * 2 篇在處理中。
+    """
+    max_workers = max(1, max_workers)
+    window = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for article in articles:
+            window.append(pool.submit(_enrich, article))
+            if len(window) >= max_workers * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
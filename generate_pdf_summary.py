@@ -1,6 +1,16 @@
+import html
+import io
+import json
 import os
 import re
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from itertools import chain
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem,
     PageBreak, Table, TableStyle, Image
@@ -12,6 +22,7 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas as rl_canvas
 
 # ========= 字體設定 =========
 FONT_CHINESE = "./biaokai.ttc"
@@ -19,84 +30,129 @@ FONT_ENGLISH = "./Times New Roman.ttf"
 # ===== 新增：上方橫條高度（使用 mm，保證不會伸進內容區） =====
 TOP_BAR_HEIGHT = 12 * mm  # 12mm ≈ 34pt，低於 topMargin=36pt
 
-if os.path.exists(FONT_CHINESE):
-    pdfmetrics.registerFont(TTFont("Biaokai", FONT_CHINESE, subfontIndex=0))
-else:
-    print("⚠️ 找不到 biaokai.ttc，將使用預設字體")
-if os.path.exists(FONT_ENGLISH):
-    pdfmetrics.registerFont(TTFont("TimesNewRoman", FONT_ENGLISH))
+LOGO_FILE = "logo.jpg"
+REPORT_TITLE = "每日生醫新聞報告"
+REPORT_SUBTITLE = "技術導讀與學習地圖"
+BACKGROUND_FORM = "NewsPageBackground"   # 每份 PDF 只畫一次的頁面背景 Form XObject
+PAGE_BG_RGB = (0.96, 0.98, 1)            # 淡藍背景
+WATERMARK_ALPHA = 0.08                   # 浮水印透明度
+DECOR_RGB, DECOR_ALPHA = (0.3, 0.6, 0.6), 0.1   # 右下角圓形裝飾
+
+# ========= 渲染資源快取（每個行程只載入一次） =========
+@lru_cache(maxsize=None)
+def register_fonts():
+    """註冊 TTF 字型；重複呼叫不會重新解析字型檔"""
+    if os.path.exists(FONT_CHINESE):
+        pdfmetrics.registerFont(TTFont("Biaokai", FONT_CHINESE, subfontIndex=0))
+    else:
+        print("⚠️ 找不到 biaokai.ttc，將使用預設字體")
+    if os.path.exists(FONT_ENGLISH):
+        pdfmetrics.registerFont(TTFont("TimesNewRoman", FONT_ENGLISH))
+
+@lru_cache(maxsize=None)
+def get_logo_reader():
+    """浮水印圖片只解碼一次；找不到或無法讀取時回傳 None"""
+    if not os.path.exists(LOGO_FILE):
+        return None
+    try:
+        return ImageReader(LOGO_FILE)
+    except Exception as e:
+        print(f"⚠️ 浮水印載入失敗：{e}")
+        return None
+
+def _over_background(rgb, alpha):
+    # 半透明顏色疊在淡藍背景上的結果（背景是純色，可以事先算好）
+    return tuple(alpha * c + (1 - alpha) * b for c, b in zip(rgb, PAGE_BG_RGB))
+
+@lru_cache(maxsize=None)
+def get_watermark_reader():
+    """
+    浮水印事先與背景色合成為不透明圖片，只做一次。
+    效果等同以 WATERMARK_ALPHA 透明度疊在淡藍背景上，但不需要 ExtGState，可以放進 Form XObject 重複使用。
+    """
+    if get_logo_reader() is None:
+        return None
+    try:
+        from PIL import Image as PILImage
+        logo = PILImage.open(LOGO_FILE).convert("RGB")
+        bg = PILImage.new("RGB", logo.size, tuple(int(round(c * 255)) for c in PAGE_BG_RGB))
+        return ImageReader(PILImage.blend(bg, logo, WATERMARK_ALPHA))
+    except Exception as e:
+        print(f"⚠️ 浮水印載入失敗：{e}")
+        return None
 
 # ========= 顏色設定 =========
 PRIMARY_COLOR = colors.HexColor("#0A3D62")
 SECONDARY_COLOR = colors.HexColor("#3C6382")
 HIGHLIGHT_COLOR = colors.HexColor("#60A3BC")
 
-# ========= 樣式設定 =========
-styles = getSampleStyleSheet()
-styles.add(ParagraphStyle(
-    name="ReportTitle", fontName="Biaokai", fontSize=28, leading=34,
-    textColor=PRIMARY_COLOR, alignment=1, spaceAfter=20
-))
-styles.add(ParagraphStyle(
-    name="ReportSubtitle", fontName="Biaokai", fontSize=16, leading=20,
-    textColor=SECONDARY_COLOR, alignment=1, spaceAfter=30
-))
-styles.add(ParagraphStyle(
-    name="ChineseHeading1", fontName="Biaokai", fontSize=20, leading=24,
-    spaceAfter=12, spaceBefore=12, textColor=PRIMARY_COLOR
-))
-styles.add(ParagraphStyle(
-    name="ChineseHeading2", fontName="Biaokai", fontSize=16, leading=20,
-    spaceAfter=10, leftIndent=8, textColor=SECONDARY_COLOR
-))
-styles.add(ParagraphStyle(
-    name="ChineseHeading3", fontName="Biaokai", fontSize=14, leading=18,
-    spaceAfter=8, leftIndent=16, textColor=HIGHLIGHT_COLOR
-))
-styles.add(ParagraphStyle(
-    name="ChineseBody", fontName="Biaokai", fontSize=12, leading=18,
-    spaceAfter=8, textColor=colors.black
-))
-styles.add(ParagraphStyle(
-    name="Quote", fontName="Biaokai", fontSize=12, leading=18,
-    leftIndent=20, spaceAfter=8, textColor=SECONDARY_COLOR, italic=True
-))
+# ========= 樣式設定（第一次排版時才註冊字型並建立樣式表） =========
+@lru_cache(maxsize=None)
+def get_styles():
+    register_fonts()
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name="ReportTitle", fontName="Biaokai", fontSize=28, leading=34,
+        textColor=PRIMARY_COLOR, alignment=1, spaceAfter=20
+    ))
+    styles.add(ParagraphStyle(
+        name="ReportSubtitle", fontName="Biaokai", fontSize=16, leading=20,
+        textColor=SECONDARY_COLOR, alignment=1, spaceAfter=30
+    ))
+    styles.add(ParagraphStyle(
+        name="ChineseHeading1", fontName="Biaokai", fontSize=20, leading=24,
+        spaceAfter=12, spaceBefore=12, textColor=PRIMARY_COLOR
+    ))
+    styles.add(ParagraphStyle(
+        name="ChineseHeading2", fontName="Biaokai", fontSize=16, leading=20,
+        spaceAfter=10, leftIndent=8, textColor=SECONDARY_COLOR
+    ))
+    styles.add(ParagraphStyle(
+        name="ChineseHeading3", fontName="Biaokai", fontSize=14, leading=18,
+        spaceAfter=8, leftIndent=16, textColor=HIGHLIGHT_COLOR
+    ))
+    styles.add(ParagraphStyle(
+        name="ChineseBody", fontName="Biaokai", fontSize=12, leading=18,
+        spaceAfter=8, textColor=colors.black
+    ))
+    styles.add(ParagraphStyle(
+        name="Quote", fontName="Biaokai", fontSize=12, leading=18,
+        leftIndent=20, spaceAfter=8, textColor=SECONDARY_COLOR, italic=True
+    ))
+    return styles
 
 # ========= 背景與浮水印 =========
-def add_page_background(canvas, doc):
-    """繪製每一頁背景 + 浮水印"""
-    canvas.saveState()
+def _draw_page_background(canvas):
     # 淡藍背景
-    canvas.setFillColorRGB(0.96, 0.98, 1)
+    canvas.setFillColorRGB(*PAGE_BG_RGB)
     canvas.rect(0, 0, A4[0], A4[1], fill=1, stroke=0)
 
     # 頂部深藍橫條（高度改為 TOP_BAR_HEIGHT）
     canvas.setFillColor(PRIMARY_COLOR)
     canvas.rect(0, A4[1] - TOP_BAR_HEIGHT, A4[0], TOP_BAR_HEIGHT, fill=1, stroke=0)
 
-    # 右下角波浪感
-    canvas.setFillColor(colors.Color(0.3, 0.6, 0.6, alpha=0.1))
+    # 右下角波浪感（與浮水印不重疊，直接用合成後的不透明顏色）
+    canvas.setFillColorRGB(*_over_background(DECOR_RGB, DECOR_ALPHA))
     canvas.circle(A4[0] - 100, 50, 120, stroke=0, fill=1)
 
-    # 浮水印
-    if os.path.exists("logo.jpg"):
-        try:
-            logo = ImageReader("logo.jpg")
-            canvas.saveState()
-            # 模擬透明度（某些版本沒有 setFillAlpha，這裡安全 try）
-            try:
-                canvas.setFillAlpha(0.08)
-            except Exception:
-                pass
-            canvas.drawImage(logo, A4[0]/2 - 250, A4[1]/2 - 250,
-                             width=500, height=500, preserveAspectRatio=True, mask='auto')
-            canvas.restoreState()
-        except Exception as e:
-            print(f"⚠️ 浮水印載入失敗：{e}")
+    # 浮水印（已預先合成透明度）
+    watermark = get_watermark_reader()
+    if watermark is not None:
+        canvas.drawImage(watermark, A4[0]/2 - 250, A4[1]/2 - 250,
+                         width=500, height=500, preserveAspectRatio=True)
 
+def add_page_background(canvas, doc):
+    """繪製每一頁背景 + 浮水印（第一頁時畫成 Form XObject，之後每頁只引用它）"""
+    canvas.saveState()
+    if not getattr(canvas, "_news_background_ready", False):
+        canvas.beginForm(BACKGROUND_FORM)
+        _draw_page_background(canvas)
+        canvas.endForm()
+        canvas._news_background_ready = True
+    canvas.doForm(BACKGROUND_FORM)
     canvas.restoreState()
 
-def add_page_number_with_bg(canvas, doc):
+def add_page_header_with_bg(canvas, doc):
     # 先畫背景與橫條
     add_page_background(canvas, doc)
 
@@ -108,35 +164,45 @@ def add_page_number_with_bg(canvas, doc):
     canvas.drawString(20 * mm, header_y, "每日生醫新聞解讀")
     canvas.restoreState()
 
+def draw_page_number(canvas, page):
     # 頁腳頁碼（維持原本顏色與位置）
     canvas.saveState()
     canvas.setFont("Biaokai", 9)
     canvas.setFillColor(colors.grey)
-    canvas.drawRightString(200 * mm, 15 * mm, f"第 {doc.page} 頁")
+    canvas.drawRightString(200 * mm, 15 * mm, f"第 {page} 頁")
     canvas.restoreState()
 
+def add_page_number_with_bg(canvas, doc):
+    add_page_header_with_bg(canvas, doc)
+    draw_page_number(canvas, doc.page)
+
 # ========= 工具 =========
+SECTION_H2 = ["摘要", "導讀", "學習路徑", "原文連結"]
+_SECTION_RE = re.compile(r"[# ]*(?:" + "|".join(SECTION_H2) + ")")
+_LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+
+def fix_heading_line(line, first=False):
+    """單行版的 fix_markdown_headings；first 表示區塊第一行"""
+    stripped = line.strip()
+    if not stripped:
+        return line
+    if first and stripped.startswith("#"):
+        return "# " + stripped.lstrip("# ").strip() + "\n"
+    if _SECTION_RE.match(stripped):
+        return "## " + stripped.lstrip("# ").strip() + "\n"
+    return line
+
 def fix_markdown_headings(lines):
-    corrected = []
-    section_h2 = ["摘要", "導讀", "學習路徑", "原文連結"]
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if not stripped:
-            corrected.append(line)
-            continue
-        if i == 0 and stripped.startswith("#"):
-            corrected.append("# " + stripped.lstrip("# ").strip() + "\n")
-            continue
-        if any(stripped.lstrip("# ").startswith(sec) for sec in section_h2):
-            corrected.append("## " + stripped.lstrip("# ").strip() + "\n")
-            continue
-        corrected.append(line)
-    return corrected
+    return [fix_heading_line(line, i == 0) for i, line in enumerate(lines)]
 
 def convert_markdown_links(text: str) -> str:
-    return re.sub(r"\[(.*?)\]\((.*?)\)", r'<a href="\2">\1</a>', text)
+    # 大部分行沒有連結，先用字串檢查跳過正規表示式
+    if "](" not in text:
+        return text
+    return _LINK_RE.sub(r'<a href="\2">\1</a>', text)
 
 def build_cover(title, subtitle):
+    styles = get_styles()
     cover = []
     # 上方深藍條
     top_bar = Table([[""]], colWidths=[460], rowHeights=[20])
@@ -144,8 +210,8 @@ def build_cover(title, subtitle):
     cover.append(top_bar)
     cover.append(Spacer(1, 40))
     # logo
-    if os.path.exists("logo.jpg"):
-        cover.append(Image("logo.jpg", width=200, height=200))
+    if get_logo_reader() is not None:
+        cover.append(Image(LOGO_FILE, width=200, height=200))
         cover.append(Spacer(1, 20))
     cover.append(Paragraph(title, styles["ReportTitle"]))
     cover.append(Paragraph(subtitle, styles["ReportSubtitle"]))
@@ -158,7 +224,7 @@ def styled_heading(text):
     tbl = Table(
         [[Paragraph(text, ParagraphStyle(
             "HeadingInBox",
-            parent=styles["ChineseHeading1"],
+            parent=get_styles()["ChineseHeading1"],
             textColor=colors.HexColor("#D4AF37"),
             fontSize=20,
             leading=24
@@ -173,12 +239,338 @@ def styled_heading(text):
     ]))
     return tbl
 
+# ========= Markdown 中介表示（IR） =========
+# 每篇文章解析成精簡的 tuple，之後才逐一轉成 flowables：
+#   ("h1", 標題) ("h2", 文字) ("h3", 文字) ("quote", 文字) ("p", 段落) ("ul", (項目, ...)) ("end",) 區塊結尾
+class _BlockParser:
+    """逐行解析一個區塊（兩個 --- 之間）；只保留尚未輸出的段落 / 清單"""
+    __slots__ = ("first", "buffer", "items")
+
+    def __init__(self):
+        self.first = True
+        self.buffer = []
+        self.items = []
+
+    def _flush_buffer(self):
+        if self.buffer:
+            text = " ".join(self.buffer).strip()
+            if text:
+                yield ("p", text)
+            self.buffer = []
+
+    def _flush(self):
+        yield from self._flush_buffer()
+        if self.items:
+            yield ("ul", tuple(self.items))
+            self.items = []
+
+    def feed(self, line):
+        l = line.strip()
+        if not l:
+            yield from self._flush()
+            return
+        l = fix_heading_line(l, self.first).strip()
+        self.first = False
+
+        if l.startswith("# "):  # H1
+            yield from self._flush()
+            yield ("h1", l[2:])
+        elif l.startswith("## "):  # H2（含 ## 學習路徑，其下的清單照一般清單處理）
+            yield from self._flush()
+            yield ("h2", l[3:])
+        elif l.startswith("### "):  # H3
+            yield from self._flush()
+            yield ("h3", l[4:])
+        elif l.startswith("> "):
+            yield from self._flush()
+            yield ("quote", l[2:])
+        elif l.startswith("- "):
+            yield from self._flush_buffer()
+            self.items.append(l[2:])
+        else:
+            self.buffer.append(l)
+
+    def close(self):
+        yield from self._flush()
+        yield ("end",)
+
+def iter_report_ir(lines, references=None):
+    """
+    逐行讀取整份報告（可直接傳入檔案物件），以 --- 分隔區塊並產生 IR，不會把整份檔案讀進記憶體。
+    references 為 list 時順便收集以 http 開頭的行。
+    """
+    block = None
+    for i, raw in enumerate(lines):
+        line = fix_heading_line(raw, i == 0)
+        stripped = line.strip()
+        if references is not None and stripped.startswith("http"):
+            references.append(stripped)
+        if stripped == "---":
+            if block is not None:
+                yield from block.close()
+                block = None
+            continue
+        if block is None:
+            block = _BlockParser()
+        yield from block.feed(line)
+    if block is not None:
+        yield from block.close()
+
+def iter_blocks_ir(paragraphs):
+    """extract_references_from_md 切好的文章區塊 → IR"""
+    for block in paragraphs:
+        parser = _BlockParser()
+        for line in block.splitlines():
+            yield from parser.feed(line)
+        yield from parser.close()
+
+def iter_flowables(ir, titles=None):
+    """IR → flowables（惰性產生）；titles 為 list 時收集所有 H1 標題"""
+    styles = get_styles()
+    for node in ir:
+        kind = node[0]
+        if kind == "h1":
+            if titles is not None:
+                titles.append(node[1].strip())
+            yield styled_heading(node[1])
+        elif kind == "h2":
+            yield Paragraph(node[1], styles["ChineseHeading2"])
+        elif kind == "h3":
+            yield Paragraph(node[1], styles["ChineseHeading3"])
+        elif kind == "quote":
+            yield Paragraph(convert_markdown_links(node[1]), styles["Quote"])
+        elif kind == "p":
+            yield Paragraph(convert_markdown_links(node[1]), styles["ChineseBody"])
+            yield Spacer(1, 8)
+        elif kind == "ul":
+            items = [ListItem(Paragraph(convert_markdown_links(it), styles["ChineseBody"])) for it in node[1]]
+            yield ListFlowable(items, bulletType="bullet")
+            yield Spacer(1, 8)
+        else:  # end
+            yield Spacer(1, 12)
+
+class LazyStory(list):
+    """
+    給 doc.build() 的 story：flowables 由產生器供應，記憶體中只保留前面 window 個。
+    platypus 只從 story 前端取用（len / [i] / del [0] / 前端插入拆頁後的剩餘部分），
+    每次存取前補滿視窗即可，已排版的 flowables 會立即被釋放。
+    """
+
+    def __init__(self, flowables, window=64):
+        super().__init__()
+        self._source = iter(flowables)
+        self._window = window
+        self._fill()
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._window:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+# ========= 其他輸出格式：HTML 摘要頁 / JSON Feed =========
+# PDF 由 ReportLab 按需拉取 flowables（見 LazyStory）；其他後端在同一次解析中收到相同的 IR 節點，
+# 不必再讀一次 Markdown，輸出只有幾十 KB，給 LINE 推播與 docs/ 網站使用
+_URL_RE = re.compile(r"https?://[^\s<>\"')\]]+")
+_RULE_RE = re.compile(r"-{3,}")
+
+class ReportRenderer(ABC):
+    """
+    輸出後端介面：feed(node) 依序收到 IR 節點，close() 寫完檔案並回傳路徑；中途失敗時呼叫 discard() 丟掉暫存內容。
+    節點依 H1 分成一篇篇文章（一次只保留一篇），子類別實作 write_article。
+    """
+    suffix = ""
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.count = 0
+        self._title = None
+        self._nodes = []
+
+    def feed(self, node):
+        kind = node[0]
+        if kind == "h1":
+            self._flush()
+            self._title = node[1].strip()
+        elif kind == "end" or (kind == "p" and _RULE_RE.fullmatch(node[1])):
+            return  # 區塊結尾與文章之間的分隔線
+        else:
+            self._nodes.append(node)
+
+    def _flush(self):
+        if self._title is not None or self._nodes:
+            self.count += 1
+            self.write_article(self.count, self._title, self._nodes)
+        self._title, self._nodes = None, []
+
+    @abstractmethod
+    def write_article(self, index, title, nodes):
+        ...
+
+    def close(self):
+        self._flush()
+        return self.output_file
+
+    def discard(self):
+        pass
+
+def _inline_html(text):
+    return convert_markdown_links(html.escape(text))
+
+def nodes_to_html(nodes):
+    """一篇文章的 IR 節點 → HTML 片段（H2 / H3 降一級，H1 由外層當作文章標題）"""
+    parts = []
+    for node in nodes:
+        kind = node[0]
+        if kind == "h2":
+            parts.append(f"<h3>{html.escape(node[1])}</h3>")
+        elif kind == "h3":
+            parts.append(f"<h4>{html.escape(node[1])}</h4>")
+        elif kind == "quote":
+            parts.append(f"<blockquote>{_inline_html(node[1])}</blockquote>")
+        elif kind == "p":
+            parts.append(f"<p>{_inline_html(node[1])}</p>")
+        elif kind == "ul":
+            parts.append("<ul>" + "".join(f"<li>{_inline_html(it)}</li>" for it in node[1]) + "</ul>")
+    return "\n".join(parts)
+
+def article_url(nodes):
+    """「原文連結」段落中的第一個網址；沒有這一段時取文章中第一個網址"""
+    first, in_source = None, False
+    for node in nodes:
+        if node[0] in ("h2", "h3"):
+            in_source = node[1].strip().startswith("原文連結")
+            continue
+        for text in (node[1] if node[0] == "ul" else (node[1],)):
+            m = _LINK_RE.search(text)
+            url = m.group(2) if m else (_URL_RE.search(text) or [None])[0]
+            if url and in_source:
+                return url
+            first = first or url
+    return first
+
+HTML_STYLE = (
+    "body{max-width:46rem;margin:0 auto;padding:1rem;font:16px/1.7 sans-serif;color:#222;background:#F5FAFF}"
+    "header{border-top:.5rem solid #0A3D62;padding-top:.5rem}header h1{color:#0A3D62;margin:.2rem 0}"
+    "header p{color:#3C6382;margin:0}nav ol{padding-left:1.4rem}"
+    "article{background:#fff;border-radius:6px;padding:.2rem 1rem 1rem;margin:1.2rem 0}"
+    "article h2{background:#2C2C2C;color:#D4AF37;margin:0 -1rem;padding:.5rem 1rem;border-radius:6px 6px 0 0}"
+    "h3{color:#3C6382}h4{color:#60A3BC}blockquote{color:#3C6382;margin-left:1rem;font-style:italic}a{color:#0A3D62}"
+)
+
+class HtmlDigestRenderer(ReportRenderer):
+    """單一靜態 HTML 頁（少量內嵌 CSS，沒有字型與圖片）：文章內容先寫進暫存檔，最後補上開頭的目錄"""
+    suffix = ".html"
+
+    def __init__(self, output_file, title=REPORT_TITLE, subtitle=REPORT_SUBTITLE):
+        super().__init__(output_file)
+        self.title = title
+        self.subtitle = subtitle
+        self._toc = []
+        self._body = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def write_article(self, index, title, nodes):
+        title = html.escape(title or "(無標題)")
+        self._toc.append(f'<li><a href="#a{index}">{title}</a></li>')
+        self._body.write(f'<article id="a{index}">\n<h2>{title}</h2>\n{nodes_to_html(nodes)}\n</article>\n')
+
+    def close(self):
+        super().close()
+        today = datetime.now().strftime("%Y/%m/%d")
+        tmp = f"{self.output_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(
+                '<!DOCTYPE html>\n<html lang="zh-Hant">\n<head>\n<meta charset="utf-8">\n'
+                '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+                f"<title>{html.escape(self.title)} {today}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n"
+                f"<header><h1>{html.escape(self.title)}</h1><p>{html.escape(self.subtitle)}｜產出日期：{today}</p></header>\n"
+                f"<nav><ol>\n" + "\n".join(self._toc) + "\n</ol></nav>\n<main>\n"
+            )
+            self._body.seek(0)
+            shutil.copyfileobj(self._body, f)
+            f.write("</main>\n</body>\n</html>\n")
+        self._body.close()
+        os.replace(tmp, self.output_file)
+        return self.output_file
+
+    def discard(self):
+        self._body.close()
+
+class JsonFeedRenderer(ReportRenderer):
+    """JSON Feed 1.1（https://jsonfeed.org/version/1.1）：每篇文章一個 item，邊收邊寫進暫存檔，close() 時才產生輸出檔"""
+    suffix = ".json"
+
+    def __init__(self, output_file, title=REPORT_TITLE):
+        super().__init__(output_file)
+        self.published = datetime.now().astimezone().isoformat(timespec="seconds")
+        self.title = title
+        self._ids = set()
+        self._items = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def write_article(self, index, title, nodes):
+        url = article_url(nodes)
+        item_id = url if url and url not in self._ids else f"{os.path.basename(self.output_file)}#{index}"
+        self._ids.add(item_id)   # id 在 feed 中必須唯一，同一網址出現兩次時改用編號
+        item = {"id": item_id}
+        if url:
+            item["url"] = url
+        if title:
+            item["title"] = title
+        item["content_html"] = nodes_to_html(nodes)
+        item["date_published"] = self.published
+        self._items.write(("\n" if index == 1 else ",\n") + json.dumps(item, ensure_ascii=False))
+
+    def close(self):
+        super().close()
+        header = json.dumps({"version": "https://jsonfeed.org/version/1.1", "title": self.title,
+                             "language": "zh-Hant"}, ensure_ascii=False)
+        tmp = f"{self.output_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(header[:-1] + ', "items": [')
+            self._items.seek(0)
+            shutil.copyfileobj(self._items, f)
+            f.write("\n]}\n")
+        self._items.close()
+        os.replace(tmp, self.output_file)
+        return self.output_file
+
+    def discard(self):
+        self._items.close()
+
+OUTPUT_RENDERERS = {"html": HtmlDigestRenderer, "json": JsonFeedRenderer}
+
+def _tee(ir, renderers):
+    """把 IR 節點同時交給其他輸出後端，再往下傳給 PDF 排版"""
+    for node in ir:
+        for renderer in renderers:
+            renderer.feed(node)
+        yield node
+
 # ========= 主要API =========
+@contextmanager
+def open_report(source):
+    """報告來源：Markdown 檔案路徑，或已經是逐行的 iterable（例如 main.py 由 ArticleStore 查出的報告）"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as f:
+            yield f
+    else:
+        with nullcontext(source) as lines:
+            yield lines
+
 def extract_references_from_md(md_file):
     paragraphs = []
     references = []
-    with open(md_file, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    with open_report(md_file) as f:
+        lines = list(f)
     lines = fix_markdown_headings(lines)
     buf = []
     for line in lines:
@@ -194,107 +586,178 @@ def extract_references_from_md(md_file):
         paragraphs.append("\n".join(buf).strip())
     return paragraphs, references
 
-def md_to_pdf(md_file, output_file="news_summary.pdf"):
-    paragraphs, refs = extract_references_from_md(md_file)
-    generate_pdf(paragraphs, refs, output_file=output_file)
-
-def generate_pdf(paragraphs, references=None, output_file="news_summary.pdf"):
-    story = build_cover("每日生醫新聞報告", "技術導讀與學習地圖")
+def md_to_pdf(md_file, output_file="news_summary.pdf", workers=0, titles_path="title.txt"):
+    """
+    預設以串流方式產生（generate_pdf_streaming），記憶體用量不隨文章數成長；
+    workers > 1 時以多行程分段渲染再合併（見 generate_pdf_parallel）。
+    titles_path 為 None 時不輸出 title.txt（main.py 改由 ArticleStore 查詢產生）
+    """
+    md_to_outputs(md_file, output_file, formats=("pdf",), workers=workers, titles_path=titles_path)
+
+def md_to_outputs(md_file, output_file="news_summary.pdf", formats=("pdf", "html", "json"), workers=0,
+                  titles_path="title.txt"):
+    """
+    Markdown 只解析一次，同時產生 formats 中的各種輸出（pdf / html / json），
+    其他格式的檔名沿用 output_file、只換副檔名。回傳 {格式: 路徑}。
+    md_file 可以是檔案路徑或逐行的 iterable（見 open_report）
+    """
+    base = os.path.splitext(output_file)[0]
+    renderers = {fmt: OUTPUT_RENDERERS[fmt](base + OUTPUT_RENDERERS[fmt].suffix) for fmt in formats if fmt != "pdf"}
+    outputs = {}
+    try:
+        if "pdf" not in formats:
+            all_titles = []
+            with open_report(md_file) as f:
+                for node in _tee(iter_report_ir(f), list(renderers.values())):
+                    if node[0] == "h1":
+                        all_titles.append(node[1].strip())
+            if titles_path:
+                write_titles(all_titles, titles_path)
+        elif workers and workers > 1:
+            paragraphs, refs = extract_references_from_md(md_file)
+            generate_pdf_parallel(paragraphs, refs, output_file=output_file, workers=workers, titles_path=titles_path,
+                                  renderers=list(renderers.values()))
+            outputs["pdf"] = output_file
+        else:
+            generate_pdf_streaming(md_file, output_file=output_file, titles_path=titles_path,
+                                   renderers=list(renderers.values()))
+            outputs["pdf"] = output_file
+    except BaseException:
+        # PDF 失敗時其他格式也不輸出，丟掉暫存內容
+        for renderer in renderers.values():
+            renderer.discard()
+        raise
+    for fmt, renderer in renderers.items():
+        outputs[fmt] = renderer.close()
+        print(f"✅ 已輸出 {fmt.upper()}：{outputs[fmt]}（{renderer.count} 篇）")
+    return outputs
+
+def build_article_story(paragraphs):
+    """把文章區塊轉成 flowables，回傳 (story, 所有 H1 標題)"""
     all_titles = []  # 🔥 用來收集標題
+    story = list(iter_flowables(iter_blocks_ir(paragraphs), all_titles))
+    return story, all_titles
 
-    for block in paragraphs:
-        lines = fix_markdown_headings(block.splitlines())
-        buffer, list_buffer = [], []
-        in_learning = False
-        learning_items = []
-
-        def flush_buffer():
-            nonlocal buffer
-            if buffer:
-                text = " ".join(buffer).strip()
-                if text:
-                    story.append(Paragraph(convert_markdown_links(text), styles["ChineseBody"]))
-                    story.append(Spacer(1, 8))
-                buffer.clear()
-
-        def flush_list():
-            nonlocal list_buffer
-            if list_buffer:
-                items = [ListItem(Paragraph(convert_markdown_links(it), styles["ChineseBody"])) for it in list_buffer]
-                story.append(ListFlowable(items, bulletType="bullet"))
-                story.append(Spacer(1, 8))
-                list_buffer.clear()
-
-        def flush_learning():
-            nonlocal learning_items
-            if learning_items:
-                story.append(Paragraph("學習路徑：", styles["ChineseHeading3"]))
-                items = [ListItem(Paragraph(it, styles["ChineseBody"])) for it in learning_items]
-                story.append(ListFlowable(items, bulletType="bullet", leftIndent=20))
-                story.append(Spacer(1, 8))
-                learning_items.clear()
-
-        for line in lines:
-            l = line.strip()
-            if not l:
-                if in_learning:
-                    flush_learning(); in_learning = False
-                else:
-                    flush_buffer(); flush_list()
-                continue
-
-            if l.startswith("# "):  # H1
-                all_titles.append(l[2:].strip())
-                flush_buffer(); flush_list()
-                story.append(styled_heading(l[2:]))
-
-            elif l.startswith("## "):  # H2
-                # all_titles.append(l[3:].strip())
-                flush_buffer(); flush_list()
-                story.append(Paragraph(l[3:], styles["ChineseHeading2"]))
-
-            elif l.startswith("### "):  # H3
-                # all_titles.append(l[4:].strip())
-                flush_buffer(); flush_list()
-                story.append(Paragraph(l[4:], styles["ChineseHeading3"]))
-
-            elif l.startswith("## 學習路徑"):
-                flush_buffer(); flush_list()
-                story.append(Paragraph("學習路徑", styles["ChineseHeading2"]))
-                in_learning = True; learning_items = []
-
-            elif in_learning and re.match(r"^\d+\.\s+", l):
-                learning_items.append(re.sub(r"^\d+\.\s+", "", l).strip())
-
-            elif l.startswith("> "):
-                flush_buffer(); flush_list()
-                story.append(Paragraph(convert_markdown_links(l[2:]), styles["Quote"]))
-
-            elif l.startswith("- "):
-                flush_buffer(); list_buffer.append(l[2:])
-
-            else:
-                buffer.append(l)
-
-        if in_learning: flush_learning()
-        flush_buffer(); flush_list()
-        story.append(Spacer(1, 12))
-
+def write_titles(all_titles, path="title.txt"):
     # ====== 將所有標題存成 title.txt ======
-    with open("title.txt", "w", encoding="utf-8") as f:
+    with open(path, "w", encoding="utf-8") as f:
         f.write("\n".join(all_titles))
-    print(f"📝 已輸出所有標題到 title.txt，共 {len(all_titles)} 筆")
+    print(f"📝 已輸出所有標題到 {path}，共 {len(all_titles)} 筆")
 
-    # ====== 產生 PDF ======
+def _build_doc(story, output_file, on_page=add_page_number_with_bg):
     doc = SimpleDocTemplate(
         output_file, pagesize=A4,
         rightMargin=24, leftMargin=24,
         topMargin=36, bottomMargin=36
     )
-    doc.build(
-        story,
-        onFirstPage=add_page_number_with_bg,
-        onLaterPages=add_page_number_with_bg
-    )
+    doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+    return doc.page
+
+def _cover_story():
+    return build_cover(REPORT_TITLE, REPORT_SUBTITLE)
+
+def generate_pdf(paragraphs, references=None, output_file="news_summary.pdf", titles_path="title.txt", renderers=()):
+    """renderers：同時收到 IR 節點的其他輸出後端（見 md_to_outputs），由呼叫端 close()"""
+    all_titles = []
+    ir = _tee(iter_blocks_ir(paragraphs), renderers)
+    story = LazyStory(chain(_cover_story(), iter_flowables(ir, all_titles)))
+
+    # ====== 產生 PDF ======
+    _build_doc(story, output_file)
+    if titles_path:
+        write_titles(all_titles, titles_path)
+    print(f"✅ 已輸出 PDF：{output_file}")
+
+def generate_pdf_streaming(md_file, output_file="news_summary.pdf", titles_path="title.txt", renderers=()):
+    """
+    邊讀 Markdown 邊排版：檔案逐行解析成 IR，flowables 由 LazyStory 按需產生，
+    已排好的頁面內容交給 canvas 後即釋放，不會同時持有整份 story。
+    """
+    all_titles = []
+    with open_report(md_file) as f:
+        flowables = iter_flowables(_tee(iter_report_ir(f), renderers), all_titles)
+        _build_doc(LazyStory(chain(_cover_story(), flowables)), output_file)
+    if titles_path:
+        write_titles(all_titles, titles_path)
     print(f"✅ 已輸出 PDF：{output_file}")
 
+# ========= 平行渲染：封面與各段文章分別在子行程產生 PDF，再合併並重新編頁碼 =========
+def _render_fragment(task):
+    """子行程執行：渲染單一片段（不含頁碼），回傳 (路徑, 頁數, 標題)"""
+    kind, payload, path = task
+    if kind == "cover":
+        story, titles = _cover_story(), []
+        # 封面最後的 PageBreak 在片段中會多出一張空白頁
+        if story and isinstance(story[-1], PageBreak):
+            story.pop()
+    else:
+        story, titles = build_article_story(payload)
+    pages = _build_doc(story, path, on_page=add_page_header_with_bg)
+    return path, pages, titles
+
+def _split_balanced(paragraphs, parts):
+    """依文字長度把文章切成 parts 段連續區塊（保持原順序）"""
+    parts = max(1, min(parts, len(paragraphs)))
+    total = sum(len(p) for p in paragraphs) or 1
+    chunks, current, size = [], [], 0
+    for p in paragraphs:
+        current.append(p)
+        size += len(p)
+        if len(chunks) < parts - 1 and size >= total * (len(chunks) + 1) / parts:
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _page_number_overlay(page_count):
+    register_fonts()   # 片段在子行程渲染，主行程可能還沒註冊字型
+    buf = io.BytesIO()
+    c = rl_canvas.Canvas(buf, pagesize=A4)
+    for page in range(1, page_count + 1):
+        draw_page_number(c, page)
+        c.showPage()
+    c.save()
+    buf.seek(0)
+    return buf
+
+def generate_pdf_parallel(paragraphs, references=None, output_file="news_summary.pdf", workers=None, chunks=None,
+                          titles_path="title.txt", renderers=()):
+    """
+    封面與各段文章在行程池中各自渲染成 PDF 片段，再依序合併並蓋上連續頁碼。
+    每個片段從新的一頁開始；需要 pypdf，沒有安裝時退回 generate_pdf。
+    renderers 在子行程排版的同時於主行程產生。
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        print("⚠️ 未安裝 pypdf，改用單行程產生 PDF")
+        return generate_pdf(paragraphs, references, output_file=output_file, titles_path=titles_path,
+                            renderers=renderers)
+
+    workers = workers or os.cpu_count() or 1
+    groups = _split_balanced(paragraphs, chunks or workers) if paragraphs else []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tasks = [("cover", None, os.path.join(tmp, "part_000.pdf"))]
+        tasks += [("articles", g, os.path.join(tmp, f"part_{i:03d}.pdf")) for i, g in enumerate(groups, 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fragments = pool.map(_render_fragment, tasks)   # 全部片段立即送出
+            for node in iter_blocks_ir(paragraphs):
+                for renderer in renderers:
+                    renderer.feed(node)
+            results = list(fragments)
+
+        if titles_path:
+            write_titles([t for _, _, titles in results for t in titles], titles_path)
+
+        writer = PdfWriter()
+        for path, _, _ in results:
+            writer.append(path)
+        overlay = PdfReader(_page_number_overlay(len(writer.pages)))
+        for page, number in zip(writer.pages, overlay.pages):
+            page.merge_page(number)
+        with open(output_file, "wb") as f:
+            writer.write(f)
+
+    print(f"✅ 已輸出 PDF：{output_file}（{len(tasks)} 個片段、{workers} 個行程）")
@@ -0,0 +1,123 @@
+# keyword_matcher.py
+# 單次掃描的關鍵字比對器：取代「每個關鍵字一個 regex」逐一搜尋，
+# 並在同一次呼叫中算出領域分類（DOMAIN_MAP）。
+#
+# 作法：把所有關鍵字建成字首樹（trie），再轉成一條共用字首的 regex，
+# 以 (?=...) lookahead 在每個位置找「最長」的命中，較短的字首關鍵字由預先算好的字首表補上。
+# 每個位置的成本只跟關鍵字長度有關，不會隨關鍵字數量線性成長。
+import re
+
+_WORD_BOUNDARY_RE = re.compile(r"[A-Za-z0-9\-\+_/\.]+")
+_WORD_CHAR_RE = re.compile(r"\w")
+
+def needs_word_boundary(kw: str) -> bool:
+    """純英數（含 - + _ / .）的關鍵字要求單字邊界；含空白或中文的關鍵字用子字串比對"""
+    return _WORD_BOUNDARY_RE.fullmatch(kw) is not None
+
+def _is_word_char(ch: str) -> bool:
+    return _WORD_CHAR_RE.match(ch) is not None
+
+def _is_boundary(text: str, pos: int) -> bool:
+    # 與 regex 的 \b 相同：前後字元一個是 \w、一個不是
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+def _trie_regex(terms) -> str:
+    """把多個字串轉成共用字首的 regex（子節點在前，讓 regex 優先取最長命中）"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if "" in node:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+def _prefix_table(terms) -> dict:
+    """term -> 同一集合中、本身也是 term 字首的較短 term（命中最長者時一併計入）"""
+    term_set = set(terms)
+    return {t: [t[:i] for i in range(1, len(t)) if t[:i] in term_set] for t in terms}
+
+class KeywordMatcher:
+    """
+    scan(text) 回傳 (命中的關鍵字清單, 領域)。
+    - 關鍵字命中規則與原本 main.py 相同：英數關鍵字要求 \\b 邊界，其餘為不分大小寫的子字串
+    - 領域規則與原本 classify_domain 相同：依 DOMAIN_MAP 順序，第一個有任一詞以子字串出現的領域
+    """
+
+    def __init__(self, keywords, domain_map=None):
+        self.keywords = list(keywords)
+        self.domains = list((domain_map or {}).keys())
+
+        # 有邊界要求的詞 / 子字串詞，各自對應到關鍵字索引與領域
+        self._bounded = {}     # term -> [keyword index]
+        self._substr = {}      # term -> ([keyword index], {domain index})
+        for idx, kw in enumerate(self.keywords):
+            term = kw.lower()
+            if not term:
+                continue
+            if needs_word_boundary(kw):
+                self._bounded.setdefault(term, []).append(idx)
+            else:
+                self._substr.setdefault(term, ([], set()))[0].append(idx)
+        for d_idx, domain in enumerate(self.domains):
+            for kw in domain_map[domain]:
+                term = kw.lower()
+                if term:
+                    self._substr.setdefault(term, ([], set()))[1].add(d_idx)
+
+        self._bounded_prefixes = _prefix_table(self._bounded)
+        self._substr_prefixes = _prefix_table(self._substr)
+        self._bounded_re = (
+            re.compile(r"\b(?=(" + _trie_regex(self._bounded) + r"\b))", re.IGNORECASE)
+            if self._bounded else None
+        )
+        self._substr_re = (
+            re.compile(r"(?=(" + _trie_regex(self._substr) + r"))", re.IGNORECASE)
+            if self._substr else None
+        )
+
+    def scan(self, text: str):
+        kw_hits = set()
+        domain_hits = set()
+
+        if self._bounded_re is not None:
+            for m in self._bounded_re.finditer(text):
+                start = m.start()
+                term = m.group(1).lower()
+                if term not in self._bounded:
+                    continue
+                kw_hits.update(self._bounded[term])
+                for p in self._bounded_prefixes[term]:
+                    # 較短的字首關鍵字也要符合結尾邊界
+                    if _is_boundary(text, start + len(p)):
+                        kw_hits.update(self._bounded[p])
+
+        if self._substr_re is not None:
+            for m in self._substr_re.finditer(text):
+                term = m.group(1).lower()
+                if term not in self._substr:
+                    continue
+                for t in [term] + self._substr_prefixes[term]:
+                    indices, domains = self._substr[t]
+                    kw_hits.update(indices)
+                    domain_hits.update(domains)
+
+        hits = [self.keywords[i] for i in sorted(kw_hits)]
+        domain = self.domains[min(domain_hits)] if domain_hits else "other"
+        return hits, domain
+
+    def keyword_hits(self, text: str) -> list:
+        return self.scan(text)[0]
+
+    def classify_domain(self, text: str) -> str:
+        return self.scan(text)[1]
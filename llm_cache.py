@@ -0,0 +1,100 @@
+# llm_cache.py
+# LLM 回應的內容定址快取：以 (model, temperature, prompt) 的雜湊為鍵存到磁碟
+# 中斷後重跑或重新產生報告時，同樣的 prompt 不會再付一次 API 費用
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+LLM_CACHE_DIR = ".cache/llm"
+LLM_CACHE_MAX_AGE_DAYS = 30      # 超過天數的回應視為過期並刪除
+LLM_CACHE_MAX_ENTRIES = 5000     # 超過筆數時從最舊的開始淘汰
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "") == "1"   # 設為 1 則略過快取（不讀也不寫）
+
+class LLMCache:
+    """每筆回應一個 JSON 檔（依雜湊前兩碼分目錄），寫入時先寫暫存檔再替換，可多執行緒共用"""
+
+    def __init__(self, directory=LLM_CACHE_DIR, max_age_days=LLM_CACHE_MAX_AGE_DAYS,
+                 max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.directory = Path(directory)
+        self.max_age = max_age_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._evicted = False
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str, provider: str = "openai", base_url: str = None) -> str:
+        """
+        快取鍵包含後端名稱與 base_url：本機模型與 OpenAI 即使 model 名稱相同也不會共用快取。
+        OpenAI（預設）維持原本的鍵，既有快取仍然有效
+        """
+        fields = [model, float(temperature), prompt]
+        if provider != "openai" or base_url:
+            fields += [provider, base_url]
+        payload = json.dumps(fields, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        self._maybe_evict()
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError
+            with open(path, "r", encoding="utf-8") as f:
+                content = json.load(f)["content"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, key: str, content: str, **meta):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"content": content, "created_at": time.time(), **meta}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _maybe_evict(self):
+        with self._lock:
+            if self._evicted:
+                return
+            self._evicted = True
+        self.evict()
+
+    def evict(self) -> int:
+        """刪除過期的回應；筆數超過上限時再從最舊的刪起"""
+        if not self.directory.exists():
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if now - mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((mtime, path))
+        if len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+llm_cache = LLMCache()
@@ -0,0 +1,221 @@
+# llm_providers.py
+# 摘要後端與分流規則：
+#   openai      OpenAI API（預設，gpt-4o）
+#   local       本機 OpenAI 相容伺服器（Ollama / llama.cpp server / vLLM 等），不計費、不受 OpenAI 限速
+#   extractive  純 CPU 的抽取式摘要（TextRank 挑出原文重點句），不需網路與 API key
+# route_article() 可把很短或分數低的文章送到便宜的後端（ROUTE_CHEAP_PROVIDER，預設關閉），其餘交給 LLM_PROVIDER。
+#
+#   LLM_PROVIDER=extractive python main.py run        完全離線產生報告
+#   LLM_PROVIDER=local LOCAL_LLM_MODEL=qwen2.5:7b python main.py run
+# 也可以用 python main.py run --provider local
+import math
+import os
+import re
+from abc import ABC, abstractmethod
+
+# ===== 後端設定 =====
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")                 # 主要後端
+OPENAI_SUMMARY_MODEL = "gpt-4o"
+LOCAL_LLM_BASE_URL = os.getenv("LOCAL_LLM_BASE_URL", "http://localhost:11434/v1")   # 預設為 Ollama
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "llama3.1:8b")
+LOCAL_LLM_TIMEOUT = 300.0      # 本機模型在 CPU 上可能很慢
+
+# ===== 分流規則 =====
+# 預設不分流：沒開全文擷取時 RSS 導言多半只有 20~50 tokens，全部會被送到便宜後端，報告就變成未翻譯的英文。
+# 要開啟時設 LLM_CHEAP_PROVIDER=extractive（或 local），並依實際內容長度調整 ROUTE_SHORT_TOKENS
+ROUTE_CHEAP_PROVIDER = os.getenv("LLM_CHEAP_PROVIDER", "")   # 空字串則全部交給 LLM_PROVIDER
+ROUTE_SHORT_TOKENS = 60        # 內容少於這個 token 數 → 便宜後端
+ROUTE_LOW_SCORE = None         # ranking 分數低於此值 → 便宜後端；None 為不依分數分流
+LLM_FALLBACK_PROVIDER = None   # 主要後端重試後仍失敗時改用的後端（例如 "extractive"）；None 則該篇記為失敗
+
+# ===== 抽取式摘要設定 =====
+EXTRACTIVE_SENTENCES = 4       # 摘要取幾句
+EXTRACTIVE_MAX_SENTENCES = 80  # 只對前 N 句建圖（相似度矩陣為 N²）
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+
+class LLMProvider(ABC):
+    """摘要後端：summarize(article) 回傳一篇 Markdown 報告（# 標題、## 摘要 …）"""
+    name = ""
+    chat = False
+    rate_limited = False   # 是否計入 summarize_with_llm 的每分鐘請求 / token 上限
+    base_url = None
+
+    def __init__(self, model: str = ""):
+        self.model = model
+
+    @abstractmethod
+    def summarize(self, article, bypass_cache=False) -> str:
+        ...
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.model!r})"
+
+class ChatProvider(LLMProvider):
+    """
+    OpenAI 相容的對話型後端：子類別提供 client()，
+    prompt、快取、重試與量測由 summarize_with_llm 負責
+    """
+    chat = True
+    rate_limited = True
+
+    def __init__(self, model: str = ""):
+        super().__init__(model)
+        self._client = None
+
+    @abstractmethod
+    def client(self):
+        ...
+
+    def summarize(self, article, bypass_cache=False) -> str:
+        from summarize_with_llm import SUMMARY_TEMPERATURE, build_article_prompt, chat_completion
+        return chat_completion(build_article_prompt(article), model=self.model, temperature=SUMMARY_TEMPERATURE,
+                               bypass_cache=bypass_cache, provider=self)
+
+class OpenAIProvider(ChatProvider):
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_SUMMARY_MODEL):
+        super().__init__(model)
+
+    def client(self):
+        # 共用 summarize_with_llm 的 client（測試 / benchmark 替換 summarize_with_llm.client 即可）
+        from summarize_with_llm import get_client
+        return get_client()
+
+class LocalProvider(ChatProvider):
+    """本機 OpenAI 相容 HTTP 伺服器（同樣用 openai 套件，只換 base_url）"""
+    name = "local"
+    rate_limited = False
+
+    def __init__(self, model: str = LOCAL_LLM_MODEL, base_url: str = LOCAL_LLM_BASE_URL):
+        super().__init__(model)
+        self.base_url = base_url
+
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            # 本機伺服器通常不檢查 API key，但 SDK 要求一定要有值
+            self._client = OpenAI(base_url=self.base_url, api_key=os.getenv("LOCAL_LLM_API_KEY", "local"),
+                                  max_retries=0, timeout=LOCAL_LLM_TIMEOUT)
+        return self._client
+
+class ExtractiveProvider(LLMProvider):
+    """TextRank 抽取原文重點句，輸出與 LLM 相同的 Markdown 段落（標題不翻譯，導讀與學習路徑以關鍵字代替）"""
+    name = "extractive"
+
+    def __init__(self, sentences: int = EXTRACTIVE_SENTENCES):
+        super().__init__("textrank")
+        self.sentences = sentences
+
+    def summarize(self, article, bypass_cache=False) -> str:
+        picked = textrank_sentences(article.get("text") or article.get("summary") or "", self.sentences)
+        hits = list(article.get("hits") or [])
+        path = " → ".join(hits[:6]) if hits else article.get("domain", "")
+        return (
+            f"# {(article.get('title') or '').strip()}\n\n"
+            f"## 摘要\n{' '.join(picked) or '（原文沒有可擷取的內容）'}\n\n"
+            f"## 導讀\n（離線摘要：以 TextRank 從原文擷取重點句，未經 LLM 翻譯與解讀）\n\n"
+            f"## 學習路徑\n{path or '（無）'}\n\n"
+            f"## 原文連結\n[點擊連結]({article.get('url', '')})"
+        )
+
+# ===== TextRank =====
+_SENTENCE_RE = re.compile(r"(?<=[。！？；!?])\s*|(?<=[.;])\s+(?=[A-Z0-9\"“(\[])|\n+")
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*|[一-鿿]")
+_STOPWORDS = frozenset(
+    "a an the and or of in on at to for from by with as is are was were be been this that these those it its "
+    "we our their they he she his her not but than then also which who whom whose what when where how into "
+    "can may might will would should could has have had do does did such using used use via per about".split()
+)
+
+def split_sentences(text: str) -> list:
+    """切句（去掉 RSS 內容殘留的 HTML 標籤與重複的句子）"""
+    seen, sentences = set(), []
+    for s in _SENTENCE_RE.split(_TAG_RE.sub(" ", text or "")):
+        s = " ".join((s or "").split())
+        if len(s) > 1 and s not in seen:
+            seen.add(s)
+            sentences.append(s)
+    return sentences
+
+def _sentence_words(sentence: str) -> set:
+    return {w for w in _WORD_RE.findall(sentence.lower()) if w not in _STOPWORDS}
+
+def textrank_sentences(text: str, k: int = EXTRACTIVE_SENTENCES) -> list:
+    """
+    TextRank（Mihalcea & Tarau 2004）：句子為節點，兩句共同詞數 / (log|Si| + log|Sj|) 為邊權重，
+    以 PageRank 迭代求分數，取前 k 句並依原文順序回傳
+    """
+    sentences = split_sentences(text)[:EXTRACTIVE_MAX_SENTENCES]
+    if len(sentences) <= k:
+        return sentences
+    words = [_sentence_words(s) for s in sentences]
+    n = len(sentences)
+    edges = [[] for _ in range(n)]    # edges[i]：[(相鄰句 j, 權重)]
+    out_weight = [0.0] * n
+    for i in range(n):
+        if len(words[i]) < 2:
+            continue
+        for j in range(i + 1, n):
+            if len(words[j]) < 2:
+                continue
+            common = len(words[i] & words[j])
+            if common:
+                w = common / (math.log(len(words[i])) + math.log(len(words[j])))
+                edges[i].append((j, w))
+                edges[j].append((i, w))
+                out_weight[i] += w
+                out_weight[j] += w
+
+    scores = [1.0] * n
+    for _ in range(TEXTRANK_ITERATIONS):
+        new = [
+            (1 - TEXTRANK_DAMPING) + TEXTRANK_DAMPING * sum(scores[j] * w / out_weight[j] for j, w in edges[i])
+            for i in range(n)
+        ]
+        delta = max(abs(a - b) for a, b in zip(new, scores))
+        scores = new
+        if delta < 1e-4:
+            break
+    # 同分時前面的句子優先（新聞與摘要通常先講重點）
+    top = sorted(range(n), key=lambda i: (-scores[i], i))[:k]
+    return [sentences[i] for i in sorted(top)]
+
+# ===== 後端登錄與分流 =====
+PROVIDER_TYPES = {"openai": OpenAIProvider, "local": LocalProvider, "extractive": ExtractiveProvider}
+_providers = {}
+
+def get_provider(name: str) -> LLMProvider:
+    """依名稱取得後端（同名共用一個實例）；名稱不存在時丟出 ValueError"""
+    provider = _providers.get(name)
+    if provider is None:
+        if name not in PROVIDER_TYPES:
+            raise ValueError(f"未知的摘要後端：{name}（可用：{', '.join(PROVIDER_TYPES)}）")
+        provider = _providers[name] = PROVIDER_TYPES[name]()
+    return provider
+
+def primary_provider() -> LLMProvider:
+    return get_provider(LLM_PROVIDER)
+
+def route_article(article) -> LLMProvider:
+    """
+    分流規則：內容很短（少於 ROUTE_SHORT_TOKENS）或分數低於 ROUTE_LOW_SCORE 的文章走 ROUTE_CHEAP_PROVIDER，
+    其餘走 LLM_PROVIDER。article 需先經過 summarize_with_llm.prepare_article（設定 text_tokens）
+    """
+    primary = primary_provider()
+    if not ROUTE_CHEAP_PROVIDER:
+        return primary
+    cheap = get_provider(ROUTE_CHEAP_PROVIDER)
+    if cheap is primary:
+        return primary
+    if article.get("text_tokens", ROUTE_SHORT_TOKENS) < ROUTE_SHORT_TOKENS:
+        return cheap
+    score = article.get("score")
+    if ROUTE_LOW_SCORE is not None and score is not None and score < ROUTE_LOW_SCORE:
+        return cheap
+    return primary
+
+def fallback_provider():
+    return get_provider(LLM_FALLBACK_PROVIDER) if LLM_FALLBACK_PROVIDER else None
@@ -1,14 +1,38 @@
 # main.py
 # RSS + 關鍵字篩選(可開關) + 領域分組 + 每領域最多5篇 + LLM 摘要 + PDF
+#   python main.py                       完整執行（同 python main.py run）
+#   python main.py run --dry-run         只抓取與篩選，列出會送去摘要的文章（不呼叫 LLM、不寫任何檔案）
+#   python main.py fetch                 分步執行：抓取 + 去重 → .cache/stages/fetched_YYYYMMDD.jsonl
+#   python main.py filter [--dry-run]    關鍵字篩選 + 領域分類 / 排序 → selected_YYYYMMDD.jsonl
+#   python main.py summarize             全文擷取 + LLM 摘要 → news_report_YYYYMMDD.md 與 ArticleStore
+#   run / summarize 可加 --provider openai|local|extractive 指定摘要後端（見 llm_providers.py）
+#   python main.py render                產生 PDF 與 title.txt
+# 匯入本模組不會執行任何步驟；OpenAI client（summarize_with_llm）、reportlab（generate_pdf_summary）
+# 與 numpy（embed_classifier）都在用到的步驟才載入，fetch / dry-run 不需要它們
+import argparse
+import json
 import os
-import re
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 
-from summarize_with_llm import generate_news_summary_and_opinion, llm_batch_summarize
+from llm_cache import llm_cache
 from report_generator import format_report
-from fetch_articles import fetch_today_from_rss
-from generate_pdf_summary import md_to_pdf
+from fetch_articles import (
+    fetch_feeds_concurrently, fetch_today_from_rss, feed_cache, get_timezone, load_urls, save_feed_cache,
+    FETCH_CONCURRENCY, FETCH_PER_HOST,
+)
+from feed_scheduler import FeedHealthStore
+from article_archive import ArticleArchive
+from article_store import Article, ArticleStore, ensure_headline, report_headline
+from seen_store import SeenStore
+from dedup import dedup_articles
+from keyword_matcher import KeywordMatcher
+from checkpoint import CheckpointJournal
+from metrics import metrics
+from ranking import score_article, select_top_per_domain
+from token_budget import token_budget
+from fulltext import enrich_articles, fulltext_cache
 
 # ====== FLAG：是否啟用關鍵字篩選 ======
 USE_KEYWORDS = True   # ← True 啟用關鍵字篩選，False 全部文章都會處理
@@ -16,6 +40,38 @@ USE_KEYWORDS = True   # ← True 啟用關鍵字篩選，False 全部文章都
 # ====== FLAG：每個領域最多處理幾篇 ======
 MAX_PER_DOMAIN = 5
 
+# ====== FLAG：入選前先依相關性排序 ======
+USE_RANKING = True   # True：收齊所有候選後各領域取分數最高的 MAX_PER_DOMAIN 篇；False：依抓取順序先到先選
+
+# ====== FLAG：領域分類方式 ======
+DOMAIN_CLASSIFIER = "rules"   # "rules"：DOMAIN_MAP 第一個命中的領域；"embedding"：向量相似度（需要 numpy，見 embed_classifier.py）
+
+# ====== FLAG：來源健康紀錄與斷路器 ======
+USE_FEED_HEALTH = True   # 記錄每個來源的延遲 / 錯誤；連續失敗的來源冷卻期間略過（見 feed_scheduler.py）
+
+# ====== FLAG：抓到的文章存入日期索引存檔（之後可用 backfill.py 重產過去的報告） ======
+USE_ARCHIVE = True
+
+# ====== FLAG：入選文章連同摘要 / 命中關鍵字存進 ArticleStore（title.txt 與 LINE 推播由此查詢） ======
+USE_ARTICLE_STORE = True
+
+# ====== FLAG：跨次執行略過已摘要過的文章 ======
+USE_SEEN_STORE = True   # False 則每次都重新處理（RSS 會同時回傳昨天與今天的文章）
+
+# ====== FLAG：跨來源去重（同一篇論文出現在多個 RSS 只摘要一次） ======
+USE_DEDUP = True
+
+# ====== FLAG：中途失敗後重跑時從檢查點接續 ======
+RESUME_FROM_CHECKPOINT = True   # False 則每次都刪掉今天的 Markdown 從頭開始
+
+# ====== FLAG：下載文章頁面擷取全文（RSS 摘要常只有一句導言） ======
+USE_FULLTEXT = False       # 只對入選文章下載；每主機連線數 / 間隔見 fulltext.py，結果快取在 .cache/fulltext
+FULLTEXT_CONCURRENCY = 8
+
+# ====== FLAG：PDF 多行程分段渲染 ======
+PDF_PARALLEL_WORKERS = 0   # 0 或 1 為單行程；> 1 時封面與文章分段平行渲染後合併（需要 pypdf）
+REPORT_FORMATS = ("pdf", "html", "json")   # 同一次解析同時輸出；html / json 只有幾十 KB，給 LINE 推播與 docs/ 網站
+
 # ====== 關鍵字設定（可用 keywords.txt 覆蓋） ======
 DEFAULT_KEYWORDS = [
     # 生理訊號 / 醫療裝置
@@ -57,37 +113,6 @@ def load_keywords(path: str) -> list[str]:
 
 KEYWORDS = load_keywords(KEYWORDS_FILE)
 
-def _word_boundary_pattern(kw: str) -> re.Pattern:
-    if re.fullmatch(r"[A-Za-z0-9\-\+_/\.]+", kw):
-        return re.compile(rf"\b{re.escape(kw)}\b", flags=re.IGNORECASE)
-    return re.compile(re.escape(kw), flags=re.IGNORECASE)
-
-KW_PATTERNS = [(_word_boundary_pattern(kw), kw) for kw in KEYWORDS]
-
-def keyword_hits(text: str) -> list[str]:
-    hits = []
-    for pat, raw in KW_PATTERNS:
-        if pat.search(text):
-            hits.append(raw)
-    return hits
-
-def article_match(article: dict) -> tuple[bool, list[str]]:
-    """檢查文章是否符合關鍵字"""
-    if not USE_KEYWORDS:
-        return True, []
-    text = " ".join([
-        article.get("title", "") or "",
-        article.get("summary", "") or "",
-        article.get("text", "") or "",
-        " ".join(article.get("categories", []) or [])
-    ])
-    hits = keyword_hits(text)
-    if KEYWORD_MODE == "AND":
-        ok = all(any(h.lower() == kw.lower() for h in hits) for kw in KEYWORDS)
-    else:
-        ok = len(hits) > 0
-    return ok, hits
-
 # ====== 領域分組（每組最多 MAX_PER_DOMAIN 篇） ======
 DOMAIN_MAP = {
     "signal": [
@@ -120,99 +145,566 @@ DOMAIN_MAP = {
     ]
 }
 
+# ====== 單次掃描比對器：關鍵字命中與領域分類一次完成 ======
+MATCHER = KeywordMatcher(KEYWORDS, DOMAIN_MAP)
+
+def keyword_hits(text: str) -> list[str]:
+    return MATCHER.keyword_hits(text)
+
 def classify_domain(text: str) -> str:
-    t = text.lower()
-    for domain, kws in DOMAIN_MAP.items():
-        if any(k.lower() in t for k in kws):
-            return domain
-    return "other"
-
-domain_count = {d: 0 for d in DOMAIN_MAP}
-
-# ===== 初始化檔案與日期 =====
-today_str = datetime.today().strftime("%Y%m%d")
-md_filename = f"news_report_{today_str}.md"
-pdf_filename = f"news_summary_{today_str}.pdf"
-Path(md_filename).unlink(missing_ok=True)
-
-# ===== 讀取 RSS URL =====
-with open("urls.txt", "r", encoding="utf-8") as f:
-    urls = [line.strip() for line in f if line.strip()]
-
-total_sources = len(urls)
-success_count = 0
-fail_count = 0
-success_sources = 0
-skipped_by_keyword = 0
-
-print(f"🔍 共 {total_sources} 個來源網站，開始掃描今天的新文章...")
-if USE_KEYWORDS:
-    print(f"🧲 關鍵字篩選：已啟用 ({KEYWORD_MODE})，關鍵字數量：{len(KEYWORDS)}")
-else:
-    print("🧲 關鍵字篩選：已停用，所有文章都會處理")
-print(f"⚖️ 每個領域最多處理 {MAX_PER_DOMAIN} 篇文章")
-
-# ===== 主迴圈 =====
-for idx, url in enumerate(urls, 1):
-    try:
-        print(f"\n📡 [{idx}/{total_sources}] 掃描來源：{url}")
-        today_articles = fetch_today_from_rss(url)
+    return MATCHER.classify_domain(text)
+
+def match_article(article: dict) -> tuple[bool, list[str], str]:
+    """一次掃描文章文字，回傳 (是否符合關鍵字, 命中關鍵字, 領域)"""
+    text = " ".join([
+        article.get("title", "") or "",
+        article.get("summary", "") or "",
+        article.get("text", "") or "",
+        " ".join(article.get("categories", []) or [])
+    ])
+    hits, domain = MATCHER.scan(text)
+    if not USE_KEYWORDS:
+        return True, [], domain
+    if KEYWORD_MODE == "AND":
+        ok = all(any(h.lower() == kw.lower() for h in hits) for kw in KEYWORDS)
+    else:
+        ok = len(hits) > 0
+    return ok, hits, domain
+
+def article_match(article: dict) -> tuple[bool, list[str]]:
+    """檢查文章是否符合關鍵字"""
+    ok, hits, _ = match_article(article)
+    return ok, hits
+
+# ====== 向量式領域分類（DOMAIN_CLASSIFIER = "embedding" 時才建立） ======
+_embedder = None
+
+def get_embedder():
+    global _embedder
+    if _embedder is None and DOMAIN_CLASSIFIER == "embedding":
+        import embed_classifier
+        if not embed_classifier.available():
+            print("⚠️ 未安裝 numpy，領域分類改用關鍵字規則")
+            return None
+        _embedder = embed_classifier.CentroidClassifier(DOMAIN_MAP, cache=embed_classifier.EmbeddingCache())
+    return _embedder
+
+def close_embedder():
+    global _embedder
+    if _embedder is not None and _embedder.cache is not None:
+        _embedder.cache.close()
+    _embedder = None
+
+# ====== 管線各階段（generator 串接：fetch → dedup → filter → classify → summarize → write） ======
+def fetch_stage(urls: list[str], stats: dict, health=None, archive=None):
+    """
+    並行抓取所有來源，依 urls.txt 順序逐篇 yield（文章附上 source 欄位）。
+    health 為 FeedHealthStore 時記錄每個來源的結果；archive 為 ArticleArchive 時同時存檔。
+    """
+    fetch = health.wrap(fetch_today_from_rss) if health is not None else None
+    feed_results = fetch_feeds_concurrently(urls, fetch=fetch)   # 並行數 / 每主機上限見 fetch_articles.py
+    for idx, (url, today_articles, fetch_err) in enumerate(feed_results, 1):
+        print(f"\n📡 [{idx}/{len(urls)}] 掃描來源：{url}")
+        if fetch_err is not None:
+            print(f"❌ 來源處理失敗：{url} → {fetch_err}")
+            stats["fail"] += 1
+            continue
         if not today_articles:
             print(f"⚠️ 今日無新文章：{url}")
             continue
 
         print(f"📰 發現 {len(today_articles)} 篇新文章")
-        source_success = 0
-
-        for i, article in enumerate(today_articles, 1):
-            try:
-                if "text" not in article:
-                    article["text"] = article.get("summary", "")
-
-                ok, hits = article_match(article)
-                if not ok:
-                    skipped_by_keyword += 1
-                    print(f"  ⏭️ 關鍵字未命中：{article.get('title','(無標題)')}")
-                    continue
-
-                # 分類領域並檢查數量限制
-                fulltext = " ".join([article.get("title",""), article.get("summary",""), article.get("text","")])
-                domain = classify_domain(fulltext)
-                if domain in domain_count and domain_count[domain] >= MAX_PER_DOMAIN:
-                    print(f"  🚫 {article.get('title')} 已達 {domain} 上限 {MAX_PER_DOMAIN}")
-                    continue
-
-                print(f"  ⏳ [{i}/{len(today_articles)}] 處理文章：{article['title']} ｜🎯 命中：{', '.join(hits[:6])}{'…' if len(hits) > 6 else ''}")
-                summary_and_opinion = generate_news_summary_and_opinion(article)
-                report = format_report(article, summary_and_opinion)
-
+        today_articles = [Article.from_dict(a) for a in today_articles]
+        for article in today_articles:
+            article["source"] = url
+        if archive is not None:
+            archive.add_many(today_articles)
+        yield from today_articles
+
+def dedup_stage(articles):
+    """跨來源去重（需要看過全部文章才能分群，是管線中的匯流點）"""
+    articles = list(articles)
+    if not USE_DEDUP:
+        yield from articles
+        return
+    unique, duplicate_count = dedup_articles(articles)
+    print(f"\n🧬 跨來源去重：{len(articles)} 篇 → {len(unique)} 篇（合併 {duplicate_count} 篇重複）")
+    yield from unique
+
+def filter_stage(articles, stats: dict, report_date: str, seen_store=None, journal=None):
+    """略過已完成 / 先前已摘要 / 關鍵字未命中的文章；命中的文章附上 hits 與 domain"""
+    for article in articles:
+        try:
+            if "text" not in article:
+                article["text"] = article.get("summary", "")
+
+            if journal is not None and journal.is_done(article):
+                stats["resumed_skip"] += 1
+                continue
+
+            if seen_store is not None and seen_store.is_seen(article, report_date):
+                stats["skipped_seen"] += 1
+                print(f"  🔁 先前報告已摘要過：{article.get('title','(無標題)')}")
+                continue
+
+            with metrics.timer("keyword_match"):
+                ok, hits, domain = match_article(article)
+            if not ok:
+                stats["skipped_by_keyword"] += 1
+                print(f"  ⏭️ 關鍵字未命中：{article.get('title','(無標題)')}")
+                continue
+
+            article["hits"] = hits
+            article["domain"] = domain
+            yield article
+
+        except Exception as article_err:
+            print(f"  ❌ 文章處理失敗：{article.get('title','(無標題)')} → {article_err}")
+            stats["fail"] += 1
+
+def classify_stage(articles, domain_count: dict, source_order: dict = None, now: datetime = None):
+    """
+    每個領域最多 MAX_PER_DOMAIN 篇。
+    USE_RANKING 時先收齊所有候選，依相關性分數（標題 / 摘要命中、新舊、來源順位）取各領域前幾名；
+    否則依抓取順序先到先選。入選文章維持原本的順序輸出。
+    """
+    if not USE_RANKING:
+        yield from _first_come_stage(articles, domain_count)
+        return
+
+    candidates = list(articles)
+    embedder = get_embedder()
+    if embedder is not None:
+        with metrics.timer("embed_classify"):
+            embedder.assign(candidates)
+    now = now or datetime.now().astimezone()
+    with metrics.timer("rank"):
+        scored = []
+        for article in candidates:
+            score = score_article(article, MATCHER.keyword_hits(article.get("title", "") or ""), source_order, now)
+            article["score"] = round(score, 3)
+            scored.append((score, article))
+        limits = {d: MAX_PER_DOMAIN - n for d, n in domain_count.items()}
+        selected, dropped = select_top_per_domain(scored, limits)
+
+    print(f"\n🏅 相關性排序：候選 {len(candidates)} 篇 → 入選 {len(selected)} 篇")
+    for article in dropped:
+        print(f"  🚫 {article.get('title')}（分數 {article['score']}）未進入 {article['domain']} 前 {MAX_PER_DOMAIN} 名")
+    for article in selected:
+        domain = article["domain"]
+        if domain in domain_count:
+            domain_count[domain] += 1
+        metrics.incr("selected", domain=domain)
+        hits = article.get("hits", [])
+        print(f"  ✅ 入選（{article['score']}）：{article['title']} ｜🎯 命中：{', '.join(hits[:6])}{'…' if len(hits) > 6 else ''}")
+        yield article
+
+def _first_come_stage(articles, domain_count: dict):
+    """依領域分組，每個領域最多 MAX_PER_DOMAIN 篇（入選即佔用名額）"""
+    embedder = get_embedder()
+    if embedder is not None:
+        # 向量分類要整批進行（以規則已分類的文章修正領域中心），一次一篇沒有意義
+        articles = list(articles)
+        with metrics.timer("embed_classify"):
+            embedder.assign(articles)
+    # 領域分類的耗時記在 keyword_match（規則）與 embed_classify（向量），這裡只是查名額
+    for article in articles:
+        domain = article["domain"]
+        full = domain in domain_count and domain_count[domain] >= MAX_PER_DOMAIN
+        if not full and domain in domain_count:
+            domain_count[domain] += 1
+        if full:
+            print(f"  🚫 {article.get('title')} 已達 {domain} 上限 {MAX_PER_DOMAIN}")
+            continue
+        metrics.incr("selected", domain=domain)
+
+        hits = article.get("hits", [])
+        print(f"  ✅ 入選：{article['title']} ｜🎯 命中：{', '.join(hits[:6])}{'…' if len(hits) > 6 else ''}")
+        yield article
+
+def fulltext_stage(articles):
+    """入選文章下載原文頁面，擷取到的正文比 RSS 摘要長就取代 article["text"]"""
+    if not USE_FULLTEXT:
+        yield from articles
+        return
+    yield from enrich_articles(articles, max_workers=FULLTEXT_CONCURRENCY)
+
+def summarize_stage(articles):
+    """
+    LLM 摘要（並行 + 限速），依入選順序 yield (article, summary, error)。
+    並行數 LLM_CONCURRENCY 與批次大小 LLM_BATCH_SIZE 在 summarize_with_llm.py 設定
+    """
+    import summarize_with_llm
+    yield from summarize_with_llm.summarize_articles(articles, max_workers=summarize_with_llm.LLM_CONCURRENCY,
+                                                     batch_size=summarize_with_llm.LLM_BATCH_SIZE)
+
+def write_stage(results, md_filename: str, stats: dict, report_date: str, seen_store=None, journal=None, store=None):
+    """逐篇寫入 Markdown，並記錄檢查點，之後重跑可從這裡接續；store 為 ArticleStore 時一併存入"""
+    for i, (article, summary_and_opinion, llm_err) in enumerate(results, 1):
+        try:
+            if llm_err is not None:
+                raise llm_err
+            print(f"  ⏳ [{i}] 完成摘要：{article['title']}")
+            report = ensure_headline(format_report(article, summary_and_opinion), article.get("title"))
+            article["report"] = report
+            article["headline"] = report_headline(report)
+
+            with metrics.timer("markdown_write"):
                 with open(md_filename, "a", encoding="utf-8") as f:
-                    f.write(report + "\n\n" + "-"*90 + "\n\n")
-
-                success_count += 1
-                source_success += 1
-                if domain in domain_count:
-                    domain_count[domain] += 1
-
-            except Exception as article_err:
-                print(f"  ❌ 文章處理失敗：{article.get('title','(無標題)')} → {article_err}")
-                fail_count += 1
-
-        if source_success > 0:
-            success_sources += 1
-
-    except Exception as source_err:
-        print(f"❌ 來源處理失敗：{url} → {source_err}")
-        fail_count += 1
-
-# ===== 統計報告 =====
-print("\n📊 爬蟲完成")
-print(f"✔️ 成功處理文章數：{success_count}")
-if USE_KEYWORDS:
-    print(f"⤴️ 關鍵字未命中而略過：{skipped_by_keyword}")
-print(f"❌ 失敗文章數：{fail_count}")
-print(f"📄 成功來源總數：{success_sources}／{total_sources}")
-
-# ===== 產出 PDF =====
-md_to_pdf(md_filename, pdf_filename)
-print(f"✅ PDF 已完成：{pdf_filename}")
+                    f.write(report_block(report))
+                if journal is not None:
+                    journal.record(article, article.get("domain", "other"), report)
+            if store is not None:
+                store.add(article, report_date)
+
+            if seen_store is not None:
+                # 同群的其他來源版本一起標記，之後不會再以另一個網址出現
+                for version in [article] + article.get("duplicates", []):
+                    seen_store.mark(version, report_date)
+
+            stats["success"] += 1
+            stats["sources"].add(article.get("source"))
+
+        except Exception as article_err:
+            print(f"  ❌ 文章處理失敗：{article.get('title','(無標題)')} → {article_err}")
+            stats["fail"] += 1
+
+def report_block(report: str) -> str:
+    """Markdown 報告中的一篇（文章之間以 90 個 - 分隔）"""
+    return report + "\n\n" + "-"*90 + "\n\n"
+
+def restore_from_checkpoint(journal, md_filename, domain_count: dict, stats: dict):
+    """以檢查點日誌重建今天的 Markdown（md_filename 為 None 時不寫檔），並還原各領域已用名額"""
+    if md_filename is not None:
+        with open(md_filename, "w", encoding="utf-8") as f:
+            for entry in journal.entries:
+                f.write(report_block(entry["report"]))
+    for entry in journal.entries:
+        domain = entry.get("domain")
+        if domain in domain_count:
+            domain_count[domain] += 1
+        stats["success"] += 1
+        stats["sources"].add(entry.get("source"))
+
+def new_stats() -> dict:
+    return {"success": 0, "fail": 0, "skipped_by_keyword": 0, "skipped_seen": 0,
+            "resumed_skip": 0, "sources": set()}
+
+# ====== 報告日期、來源與分步執行的中間檔 ======
+STAGE_DIR = ".cache/stages"   # python main.py fetch / filter / summarize 之間以 JSON Lines 傳遞文章
+
+def report_files(today_str: str) -> tuple[str, str]:
+    return f"news_report_{today_str}.md", f"news_summary_{today_str}.pdf"
+
+def report_now(report_date: str = None):
+    # 重產過去的報告時，新舊程度以報告當天（報告時區 REPORT_TIMEZONE）結束時計算；今天的報告用現在時間（None）
+    if not report_date:
+        return None
+    return datetime.strptime(report_date, "%Y%m%d").replace(hour=23, minute=59, tzinfo=get_timezone())
+
+def stage_file(name: str, today_str: str) -> Path:
+    return Path(STAGE_DIR) / f"{name}_{today_str}.jsonl"
+
+def save_stage(articles, path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for article in articles:
+            # duplicates 裡的其他版本也是 Article，一併轉成 dict
+            f.write(json.dumps(article.to_dict(), ensure_ascii=False, default=Article.to_dict) + "\n")
+            n += 1
+    return n
+
+def load_stage(path: Path, previous: str):
+    """讀回前一步的中間檔；不存在時提示要先執行哪一步並回傳 None"""
+    if not path.exists():
+        print(f"❌ 找不到 {path}，請先執行 python main.py {previous}")
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return [Article.from_dict(json.loads(line)) for line in f if line.strip()]
+
+def skip_paused_sources(urls: list[str], health, probe: bool = True) -> list[str]:
+    """略過斷路器冷卻中的來源；probe=False（dry-run）時不把冷卻結束的來源轉為 half_open"""
+    if health is None:
+        return urls
+    paused = [u for u in urls if not health.allow(u, probe=probe)]
+    for url in paused:
+        print(f"⏸️ 來源連續失敗，冷卻中略過：{url}")
+    return [u for u in urls if u not in paused]
+
+def open_journal(today_str: str, md_filename: str, domain_count: dict, stats: dict, store=None, rebuild=True):
+    """
+    檢查點接續或從頭開始。
+    rebuild=True：有日誌時重建今天的 Markdown，否則刪掉今天的 Markdown / 日誌 / ArticleStore 內容；
+    rebuild=False（dry-run、filter）：只讀取日誌還原名額，不動任何檔案；不接續時回傳 None。
+    """
+    journal = CheckpointJournal(today_str)
+    if RESUME_FROM_CHECKPOINT and journal.entries:
+        restore_from_checkpoint(journal, md_filename if rebuild else None, domain_count, stats)
+        print(f"♻️ 從檢查點接續：今天已完成 {len(journal.entries)} 篇，這些文章不會重新處理")
+        return journal
+    if not rebuild:
+        return None
+    journal.reset()
+    Path(md_filename).unlink(missing_ok=True)
+    if store is not None:
+        store.clear_report(today_str)
+    return journal
+
+def collect_articles(urls: list[str], stats: dict, health=None, archive=None, archived_articles: list = None):
+    """fetch → dedup（archived_articles 不為 None 時改用存檔中的文章，不抓 RSS）"""
+    if archived_articles is not None:
+        articles = (Article.from_dict(a) for a in archived_articles)
+    else:
+        articles = fetch_stage(urls, stats, health, archive)
+    return dedup_stage(articles)
+
+def select_articles(articles, stats: dict, today_str: str, domain_count: dict, urls: list[str],
+                    seen_store=None, journal=None, now: datetime = None):
+    """filter → classify"""
+    articles = filter_stage(articles, stats, today_str, seen_store, journal)
+    return classify_stage(articles, domain_count, {url: i for i, url in enumerate(urls)}, now)
+
+def report_articles(articles, md_filename: str, stats: dict, today_str: str, seen_store=None, journal=None, store=None):
+    """fulltext → summarize → write"""
+    write_stage(summarize_stage(fulltext_stage(articles)), md_filename, stats, today_str, seen_store, journal, store)
+
+def render_report(today_str: str, store=None):
+    """
+    產生 PDF 與 REPORT_FORMATS 中的其他格式。有 ArticleStore 且查得到這一天的文章時，
+    報告內容與 title.txt 都由查詢產生（依寫入順序），否則解析 news_report_*.md
+    """
+    from generate_pdf_summary import md_to_outputs, write_titles   # reportlab 與字型只在產生報告時載入
+
+    md_filename, pdf_filename = report_files(today_str)
+    articles = store.articles(today_str) if store is not None else []
+    if articles:
+        print(f"🗃️ 由 ArticleStore 產生報告：{len(articles)} 篇")
+        source = (line for a in articles for line in report_block(a["report"] or "").splitlines(keepends=True))
+    else:
+        source = md_filename
+    with metrics.timer("pdf_build"):
+        outputs = md_to_outputs(source, pdf_filename, formats=REPORT_FORMATS, workers=PDF_PARALLEL_WORKERS,
+                                titles_path=None if articles else "title.txt")
+    if "pdf" in outputs:
+        print(f"✅ PDF 已完成：{pdf_filename}")
+    if articles:
+        write_titles(store.titles(today_str))
+
+def print_selection(selected: list):
+    print(f"\n🧪 dry-run：共 {len(selected)} 篇會送去摘要（未呼叫 LLM，也未寫入報告與檢查點）")
+    for domain, n in Counter(a.get("domain", "other") for a in selected).most_common():
+        print(f"   {domain}：{n} 篇")
+
+def print_stats(stats: dict, total_sources: int):
+    print("\n📊 爬蟲完成")
+    print(f"✔️ 成功處理文章數：{stats['success']}")
+    if stats["resumed_skip"]:
+        print(f"♻️ 檢查點已完成而略過：{stats['resumed_skip']}")
+    if USE_KEYWORDS:
+        print(f"⤴️ 關鍵字未命中而略過：{stats['skipped_by_keyword']}")
+    if USE_SEEN_STORE:
+        print(f"🔁 先前已摘要而略過：{stats['skipped_seen']}")
+    print(f"❌ 失敗文章數：{stats['fail']}")
+    print(f"📄 成功來源總數：{len(stats['sources'])}／{total_sources}")
+    print(f"🧠 LLM 快取：命中 {llm_cache.hits}／未命中 {llm_cache.misses}（未命中才會呼叫 API）")
+    if USE_FULLTEXT:
+        print(f"📃 全文快取：命中 {fulltext_cache.hits}／未命中 {fulltext_cache.misses}")
+    budget = token_budget.summary()
+    print(f"✂️ 內容 token：送出 {budget['used']}，裁切 {budget['trimmed']} 篇、省下 {budget['saved']}"
+          f"（{'tiktoken' if budget['exact'] else '估算'}）")
+    print(f"🗃️ RSS 快取：命中 {feed_cache.hits}（304 未變更）／未命中 {feed_cache.misses}")
+
+def record_run_metrics(stats: dict):
+    budget = token_budget.summary()
+    for name in ("success", "fail", "skipped_by_keyword", "skipped_seen", "resumed_skip"):
+        metrics.incr(name, stats[name])
+    metrics.incr("llm_content_tokens", budget["used"])
+    metrics.incr("llm_tokens_saved", budget["saved"])
+    export_metrics()
+
+def main(report_date: str = None, archived_articles: list = None, dry_run: bool = False):
+    """
+    report_date：報告日期 YYYYMMDD（預設今天）。
+    archived_articles：改用存檔中的文章（backfill.py 重產過去的報告），不抓 RSS。
+    dry_run：只抓取與篩選，列出會送去摘要的文章；不呼叫 LLM，也不寫入報告、檢查點、存檔與 RSS 快取。
+    """
+    # ===== 初始化檔案與日期 =====
+    today_str = report_date or datetime.today().strftime("%Y%m%d")
+    md_filename, _ = report_files(today_str)
+
+    # ===== 讀取 RSS URL =====
+    urls = load_urls()
+
+    total_sources = len(urls)
+    stats = new_stats()
+    domain_count = {d: 0 for d in DOMAIN_MAP}
+    seen_store = SeenStore() if USE_SEEN_STORE else None
+    from_archive = archived_articles is not None
+    health = FeedHealthStore() if USE_FEED_HEALTH and not from_archive else None
+    archive = ArticleArchive() if USE_ARCHIVE and not from_archive and not dry_run else None
+    store = ArticleStore() if USE_ARTICLE_STORE and not dry_run else None
+    urls = skip_paused_sources(urls, health, probe=not dry_run)
+    journal = open_journal(today_str, md_filename, domain_count, stats, store, rebuild=not dry_run)
+
+    if from_archive:
+        print(f"🗄️ 從存檔重產 {today_str} 的報告：{len(archived_articles)} 篇文章")
+    else:
+        print(f"🔍 共 {total_sources} 個來源網站，開始掃描今天的新文章...")
+    if USE_KEYWORDS:
+        print(f"🧲 關鍵字篩選：已啟用 ({KEYWORD_MODE})，關鍵字數量：{len(KEYWORDS)}")
+    else:
+        print("🧲 關鍵字篩選：已停用，所有文章都會處理")
+    print(f"⚖️ 每個領域最多處理 {MAX_PER_DOMAIN} 篇文章")
+    print(f"🚀 並行抓取：最多 {FETCH_CONCURRENCY} 個來源同時進行，每個主機最多 {FETCH_PER_HOST} 個連線")
+
+    # ===== 串接管線 =====
+    # dry-run 不記錄來源健康狀態（只用來略過冷卻中的來源）
+    articles = collect_articles(urls, stats, None if dry_run else health, archive, archived_articles)
+    articles = select_articles(articles, stats, today_str, domain_count, urls, seen_store, journal,
+                               report_now(report_date))
+    if dry_run:
+        print_selection(list(articles))
+    else:
+        report_articles(articles, md_filename, stats, today_str, seen_store, journal, store)
+        save_feed_cache()
+
+    if seen_store is not None:
+        seen_store.close()
+    close_embedder()
+    if health is not None:
+        health.close()
+    if archive is not None:
+        archive.close()
+    if dry_run:
+        return
+
+    # ===== 統計報告 =====
+    print_stats(stats, total_sources)
+
+    # ===== 產出 PDF =====
+    render_report(today_str, store)
+    if store is not None:
+        store.close()
+
+    # ===== 執行量測輸出 =====
+    record_run_metrics(stats)
+
+# ====== 分步執行（每一步讀寫 .cache/stages 中間檔，可分開重跑） ======
+def fetch_command(today_str: str):
+    urls = load_urls()
+    stats = new_stats()
+    health = FeedHealthStore() if USE_FEED_HEALTH else None
+    archive = ArticleArchive() if USE_ARCHIVE else None
+    try:
+        path = stage_file("fetched", today_str)
+        n = save_stage(collect_articles(skip_paused_sources(urls, health), stats, health, archive), path)
+        save_feed_cache()
+    finally:
+        if health is not None:
+            health.close()
+        if archive is not None:
+            archive.close()
+    print(f"\n💾 抓取完成：{n} 篇（失敗來源 {stats['fail']} 個）→ {path}")
+
+def filter_command(today_str: str, report_date: str = None, dry_run: bool = False):
+    fetched = load_stage(stage_file("fetched", today_str), "fetch")
+    if fetched is None:
+        return
+    stats = new_stats()
+    domain_count = {d: 0 for d in DOMAIN_MAP}
+    md_filename, _ = report_files(today_str)
+    journal = open_journal(today_str, md_filename, domain_count, stats, rebuild=False)
+    seen_store = SeenStore() if USE_SEEN_STORE else None
+    try:
+        selected = list(select_articles(fetched, stats, today_str, domain_count, load_urls(),
+                                        seen_store, journal, report_now(report_date)))
+    finally:
+        if seen_store is not None:
+            seen_store.close()
+        close_embedder()
+    if dry_run:
+        print_selection(selected)
+        return
+    path = stage_file("selected", today_str)
+    save_stage(selected, path)
+    print(f"\n💾 入選 {len(selected)} 篇（關鍵字未命中 {stats['skipped_by_keyword']}、先前已摘要 "
+          f"{stats['skipped_seen']}）→ {path}")
+
+def summarize_command(today_str: str):
+    selected = load_stage(stage_file("selected", today_str), "filter")
+    if selected is None:
+        return
+    stats = new_stats()
+    md_filename, _ = report_files(today_str)
+    store = ArticleStore() if USE_ARTICLE_STORE else None
+    seen_store = SeenStore() if USE_SEEN_STORE else None
+    journal = open_journal(today_str, md_filename, {d: 0 for d in DOMAIN_MAP}, stats, store)
+    # filter 之後才由其他執行完成的文章不再重做
+    articles = [a for a in selected if not journal.is_done(a)]
+    stats["resumed_skip"] = len(selected) - len(articles)
+    try:
+        report_articles(articles, md_filename, stats, today_str, seen_store, journal, store)
+    finally:
+        if seen_store is not None:
+            seen_store.close()
+        if store is not None:
+            store.close()
+    print_stats(stats, len(load_urls()))
+    record_run_metrics(stats)
+
+def render_command(today_str: str):
+    store = ArticleStore() if USE_ARTICLE_STORE else None
+    try:
+        render_report(today_str, store)
+    finally:
+        if store is not None:
+            store.close()
+
+def cli(argv=None):
+    ap = argparse.ArgumentParser(description="每日生醫新聞報告：RSS → 關鍵字篩選 → LLM 摘要 → PDF")
+    sub = ap.add_subparsers(dest="command")
+    p = sub.add_parser("run", help="完整執行（不指定子命令時的預設）")
+    p.add_argument("--dry-run", action="store_true", help="只抓取與篩選，列出會送去摘要的文章")
+    p.add_argument("--provider", help="摘要後端 openai / local / extractive（預設 LLM_PROVIDER 環境變數或 openai）")
+    for name, help_text in (("fetch", "抓取 RSS 並去重"), ("filter", "關鍵字篩選 + 領域分類 / 排序"),
+                            ("summarize", "全文擷取 + LLM 摘要，寫入 Markdown"), ("render", "產生 PDF 與 title.txt")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--date", help="報告日期 YYYYMMDD（預設今天；跨日分步執行時指定同一天）")
+        if name == "filter":
+            p.add_argument("--dry-run", action="store_true", help="只列出入選文章，不寫中間檔")
+        if name == "summarize":
+            p.add_argument("--provider", help="摘要後端 openai / local / extractive")
+    args = ap.parse_args(argv)
+
+    if getattr(args, "provider", None):
+        import llm_providers
+        if args.provider not in llm_providers.PROVIDER_TYPES:
+            ap.error(f"未知的摘要後端：{args.provider}（可用：{', '.join(llm_providers.PROVIDER_TYPES)}）")
+        llm_providers.LLM_PROVIDER = args.provider
+
+    if args.command in (None, "run"):
+        main(dry_run=getattr(args, "dry_run", False))
+        return
+    today_str = args.date or datetime.today().strftime("%Y%m%d")
+    if args.command == "fetch":
+        fetch_command(today_str)
+    elif args.command == "filter":
+        filter_command(today_str, args.date, args.dry_run)
+    elif args.command == "summarize":
+        summarize_command(today_str)
+    else:
+        render_command(today_str)
+
+def export_metrics():
+    jsonl_path, prom_path = metrics.export()
+    print(f"📈 執行量測：{jsonl_path}、{prom_path}")
+    for source, seconds in metrics.slowest("fetch", "source", top=5):
+        print(f"   🐢 {seconds:6.2f}s  {source}")
+    for model, agg in metrics.summary()["llm"].items():
+        print(f"   💰 {model}：{agg['calls']} 次、prompt {agg['prompt_tokens']} / completion "
+              f"{agg['completion_tokens']} tokens、約 ${agg['cost_usd']:.4f}")
+
+
+if __name__ == "__main__":
+    cli()
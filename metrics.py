@@ -0,0 +1,177 @@
+# metrics.py
+# 執行期量測：各階段計時、計數器、LLM 呼叫（延遲 / token / 成本）
+# 每次執行輸出 JSON Lines（逐筆事件 + 最後一行彙總）與 Prometheus 文字檔，方便找出最慢的來源與最花錢的階段
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+METRICS_DIR = "metrics"
+
+# 每百萬 token 價格（USD）：(prompt, completion)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+def llm_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+def _label_str(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in sorted(labels.items()):
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+class RunMetrics:
+    """
+    timer(stage, **labels)：累計該階段的次數 / 總秒數 / 最大秒數；有 labels（例如 source=URL）時另外記一筆事件。
+    incr(name, value, **labels)：計數器。
+    observe_llm(...)：每次 LLM API 呼叫記一筆事件並累計 token 與成本。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.events = []
+        self.timers = {}     # (stage, labels) -> [count, total, max]
+        self.counters = {}   # (name, labels) -> value
+        self.llm = {}        # model -> {calls, seconds, prompt_tokens, completion_tokens, cost}
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        t0 = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                agg = self.timers.setdefault((stage, ()), [0, 0.0, 0.0])
+                agg[0] += 1
+                agg[1] += elapsed
+                agg[2] = max(agg[2], elapsed)
+                if labels:
+                    key = (stage, tuple(sorted(labels.items())))
+                    per = self.timers.setdefault(key, [0, 0.0, 0.0])
+                    per[0] += 1
+                    per[1] += elapsed
+                    per[2] = max(per[2], elapsed)
+                    event = {"type": "timer", "stage": stage, "seconds": round(elapsed, 6),
+                             "ts": time.time(), **labels}
+                    if error:
+                        event["error"] = error
+                    self.events.append(event)
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe_llm(self, model: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0):
+        cost = llm_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            agg = self.llm.setdefault(model, {"calls": 0, "seconds": 0.0, "prompt_tokens": 0,
+                                              "completion_tokens": 0, "cost_usd": 0.0})
+            agg["calls"] += 1
+            agg["seconds"] += seconds
+            agg["prompt_tokens"] += prompt_tokens
+            agg["completion_tokens"] += completion_tokens
+            agg["cost_usd"] += cost
+            self.events.append({"type": "llm_call", "model": model, "seconds": round(seconds, 6),
+                                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                "cost_usd": round(cost, 6), "ts": time.time()})
+
+    def summary(self) -> dict:
+        with self._lock:
+            stages = {}
+            for (stage, labels), (count, total, peak) in self.timers.items():
+                if not labels:
+                    stages[stage] = {"count": count, "seconds": round(total, 6), "max_seconds": round(peak, 6)}
+            counters = {}
+            for (name, labels), value in self.counters.items():
+                counters[name + _label_str(dict(labels))] = value
+            return {
+                "type": "summary",
+                "started": datetime.fromtimestamp(self.started).isoformat(),
+                "wall_seconds": round(time.time() - self.started, 3),
+                "stages": stages,
+                "counters": counters,
+                "llm": {m: dict(v, cost_usd=round(v["cost_usd"], 6)) for m, v in self.llm.items()},
+            }
+
+    def slowest(self, stage: str, label: str, top: int = 5) -> list:
+        """回傳某階段依 label 分組後最慢的前幾名 [(label 值, 總秒數)]"""
+        with self._lock:
+            rows = [(dict(labels).get(label), total)
+                    for (s, labels), (_, total, _) in self.timers.items()
+                    if s == stage and labels and label in dict(labels)]
+        return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+    def write_jsonl(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.write(json.dumps(self.summary(), ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path):
+        """Prometheus textfile 格式（node_exporter textfile collector 可直接讀）"""
+        lines = [
+            "# HELP news_stage_seconds_total Total seconds spent per pipeline stage.",
+            "# TYPE news_stage_seconds_total counter",
+        ]
+        with self._lock:
+            timers = dict(self.timers)
+            counters = dict(self.counters)
+            llm = {m: dict(v) for m, v in self.llm.items()}
+        for (stage, labels), (count, total, _) in sorted(timers.items()):
+            lines.append(f"news_stage_seconds_total{_label_str({'stage': stage, **dict(labels)})} {total:.6f}")
+        lines += ["# HELP news_stage_calls_total Number of timed calls per pipeline stage.",
+                  "# TYPE news_stage_calls_total counter"]
+        for (stage, labels), (count, _, _) in sorted(timers.items()):
+            lines.append(f"news_stage_calls_total{_label_str({'stage': stage, **dict(labels)})} {count}")
+        lines += ["# HELP news_events_total Pipeline counters.", "# TYPE news_events_total counter"]
+        for (name, labels), value in sorted(counters.items()):
+            lines.append(f"news_events_total{_label_str({'name': name, **dict(labels)})} {value}")
+        lines += ["# HELP news_llm_tokens_total LLM tokens by model and kind.", "# TYPE news_llm_tokens_total counter"]
+        for model, agg in sorted(llm.items()):
+            lines.append(f"news_llm_tokens_total{_label_str({'model': model, 'kind': 'prompt'})} {agg['prompt_tokens']}")
+            lines.append(f"news_llm_tokens_total{_label_str({'model': model, 'kind': 'completion'})} {agg['completion_tokens']}")
+        lines += ["# HELP news_llm_cost_usd_total Estimated LLM spend in USD.", "# TYPE news_llm_cost_usd_total counter"]
+        for model, agg in sorted(llm.items()):
+            lines.append(f"news_llm_cost_usd_total{_label_str({'model': model})} {agg['cost_usd']:.6f}")
+        lines += ["# HELP news_llm_seconds_total LLM API latency in seconds.", "# TYPE news_llm_seconds_total counter"]
+        for model, agg in sorted(llm.items()):
+            lines.append(f"news_llm_seconds_total{_label_str({'model': model})} {agg['seconds']:.6f}")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        tmp.replace(path)
+
+    def export(self, directory=METRICS_DIR, run_id: str = None) -> tuple:
+        """寫出 run_<id>.jsonl 與 latest.prom，回傳兩個路徑"""
+        run_id = run_id or datetime.fromtimestamp(self.started).strftime("%Y%m%d_%H%M%S")
+        directory = Path(directory)
+        jsonl = directory / f"run_{run_id}.jsonl"
+        prom = directory / "latest.prom"
+        self.write_jsonl(jsonl)
+        self.write_prometheus(prom)
+        return jsonl, prom
+
+metrics = RunMetrics()
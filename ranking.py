@@ -0,0 +1,65 @@
+# ranking.py
+# 送進 LLM 前的相關性排序：先收齊所有候選文章，再依
+#   標題命中關鍵字（權重高）＋ 摘要 / 內文命中 ＋ 發表時間新舊 ＋ 來源優先序（urls.txt 越前面越優先）
+# 計分，每個領域用 heap 取前 N 篇；與抓取先後順序無關
+import heapq
+import math
+from datetime import datetime, timezone
+
+TITLE_HIT_WEIGHT = 3.0      # 標題中每個命中關鍵字
+BODY_HIT_WEIGHT = 1.0       # 只出現在摘要 / 內文的命中關鍵字
+RECENCY_WEIGHT = 2.0        # 剛發表的文章最多加這麼多分，隨時間指數遞減
+RECENCY_HALF_LIFE_HOURS = 24
+SOURCE_WEIGHT = 1.0         # 第一個來源加滿分，最後一個來源加 0
+
+def _age_hours(publish_date: str, now: datetime) -> float:
+    try:
+        dt = datetime.fromisoformat(publish_date)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        ref = now.replace(tzinfo=None) if now.tzinfo else now
+    else:
+        ref = now if now.tzinfo else now.astimezone(timezone.utc)
+    return max(0.0, (ref - dt).total_seconds() / 3600)
+
+def score_article(article: dict, title_hits, source_order: dict = None, now: datetime = None) -> float:
+    """
+    title_hits：標題中命中的關鍵字；article["hits"] 為全文命中的關鍵字（filter_stage 設定）。
+    source_order：{來源網址: 順位}，缺少時不加來源分數。
+    """
+    title_set = {h.lower() for h in title_hits}
+    body_only = [h for h in article.get("hits", []) if h.lower() not in title_set]
+    score = TITLE_HIT_WEIGHT * len(title_set) + BODY_HIT_WEIGHT * len(body_only)
+
+    age = _age_hours(article.get("publish_date"), now or datetime.now().astimezone())
+    if age is not None:
+        score += RECENCY_WEIGHT * math.pow(0.5, age / RECENCY_HALF_LIFE_HOURS)
+
+    if source_order:
+        rank = source_order.get(article.get("source"))
+        if rank is not None:
+            score += SOURCE_WEIGHT * (1 - rank / max(1, len(source_order) - 1))
+    return score
+
+def select_top_per_domain(scored, limits: dict):
+    """
+    scored：[(score, article)]（依到達順序）；limits：{領域: 剩餘名額}，不在 limits 中的領域（other）不設上限。
+    回傳 (入選, 落選)，兩者都維持到達順序。
+    """
+    by_domain = {}
+    for idx, (score, article) in enumerate(scored):
+        by_domain.setdefault(article.get("domain", "other"), []).append((score, -idx, article))
+
+    keep = set()
+    for domain, items in by_domain.items():
+        if domain in limits:
+            # 同分時先到的優先（-idx 較大）
+            chosen = heapq.nlargest(max(0, limits[domain]), items, key=lambda t: (t[0], t[1]))
+        else:
+            chosen = items
+        keep.update(-neg_idx for _, neg_idx, _ in chosen)
+
+    selected = [article for idx, (_, article) in enumerate(scored) if idx in keep]
+    dropped = [article for idx, (_, article) in enumerate(scored) if idx not in keep]
+    return selected, dropped
@@ -0,0 +1,47 @@
+# rate_limiter.py
+# 令牌桶限速：同時限制每分鐘請求數與每分鐘 token 數（多執行緒共用）
+import threading
+import time
+
+class TokenBucket:
+    """容量為 capacity、每秒補充 rate 個令牌的令牌桶"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # 單次需求超過容量時最多等到桶滿，避免永遠等不到
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+class RateLimiter:
+    """每分鐘請求數（RPM）+ 每分鐘 token 數（TPM）兩個令牌桶，兩者都有額度才放行"""
+
+    def __init__(self, requests_per_min: float, tokens_per_min: float):
+        self.requests = TokenBucket(requests_per_min, requests_per_min / 60.0)
+        self.tokens = TokenBucket(tokens_per_min, tokens_per_min / 60.0)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(tokens)
+                    return
+            time.sleep(wait)
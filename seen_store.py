@@ -0,0 +1,68 @@
+# seen_store.py
+# 已處理文章索引（SQLite）：跨次執行略過已經摘要過的文章
+import sqlite3
+import time
+from pathlib import Path
+
+from article_keys import article_keys
+
+SEEN_DB = ".cache/seen_articles.sqlite"
+SEEN_TTL_DAYS = 30   # 超過天數的紀錄自動淘汰（RSS 通常不會再出現那麼舊的文章）
+
+class SeenStore:
+    """
+    以正規化 URL / DOI / 標題雜湊為鍵的已處理文章索引。
+    report_date 記錄文章寫入哪一天的報告：同一天重跑時報告會重建，所以只把「更早的報告」視為已處理。
+    """
+
+    def __init__(self, path=SEEN_DB, ttl_days=SEEN_TTL_DAYS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_days = ttl_days
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " key TEXT PRIMARY KEY,"
+            " report_date TEXT NOT NULL,"
+            " seen_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_at ON seen(seen_at)")
+        self.conn.commit()
+        self.evicted = self.evict_expired()
+
+    def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl_days * 86400
+        cur = self.conn.execute("DELETE FROM seen WHERE seen_at < ?", (cutoff,))
+        self.conn.commit()
+        return cur.rowcount
+
+    def is_seen(self, article: dict, report_date: str) -> bool:
+        """文章任一識別鍵出現在 report_date 之前的報告中即視為已處理"""
+        keys = article_keys(article)
+        if not keys:
+            return False
+        marks = ",".join("?" * len(keys))
+        row = self.conn.execute(
+            f"SELECT 1 FROM seen WHERE key IN ({marks}) AND report_date < ? LIMIT 1",
+            (*keys, report_date),
+        ).fetchone()
+        return row is not None
+
+    def mark(self, article: dict, report_date: str):
+        """
+        記錄文章寫入 report_date 的報告；已有紀錄時保留最先收錄它的報告日期。
+        回補較早的一天時若改寫成較早的日期，之後重跑原本那天會把自己的文章當成已處理而略過
+        """
+        now = time.time()
+        self.conn.executemany(
+            "INSERT INTO seen (key, report_date, seen_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET seen_at = excluded.seen_at",
+            [(k, report_date, now) for k in article_keys(article)],
+        )
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
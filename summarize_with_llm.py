@@ -1,10 +1,125 @@
-from openai import OpenAI
+import json
 import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-# 單篇文章處理
-def generate_news_summary_and_opinion(article):
-    prompt = f"""
+from llm_cache import llm_cache, LLM_CACHE_BYPASS
+from llm_providers import fallback_provider, get_provider, primary_provider, route_article
+from rate_limiter import RateLimiter
+from token_budget import token_budget, count_tokens, truncate_to_tokens, LLM_ARTICLE_TOKEN_LIMIT
+from metrics import metrics
+
+# ===== 並行與限速設定 =====
+LLM_CONCURRENCY = 4            # 同時進行的 LLM 請求數上限
+LLM_REQUESTS_PER_MIN = 60      # 每分鐘請求數（依 OpenAI 帳號等級調整）
+LLM_TOKENS_PER_MIN = 30000     # 每分鐘 token 數（prompt + 預估輸出）
+LLM_EXPECTED_OUTPUT_TOKENS = 1000
+LLM_MAX_RETRIES = 5            # 429 / 5xx / 連線錯誤的重試次數
+LLM_BACKOFF_BASE = 1.0         # 指數退避基準秒數（實際等待加上隨機抖動）
+LLM_BACKOFF_MAX = 60.0
+
+# ===== 批次摘要設定（多篇文章合併成一次請求，回傳 JSON 再拆回各篇） =====
+LLM_BATCH_SIZE = 0             # 每批最多幾篇；0 或 1 為逐篇請求
+LLM_BATCH_TOKEN_BUDGET = 6000  # 每批 prompt 中文章內容的 token 上限（超過就另開一批）
+
+# OpenAI client 在第一次請求時才建立（匯入本模組不需要 API key，也不載入 openai 套件）；
+# 測試 / benchmark 可以直接指定 client 換成假的實作。本機模型 / 離線摘要等其他後端見 llm_providers.py
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+        # 重試由 chat_completion 負責（含限速與抖動），所以關掉 SDK 內建重試
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return client
+
+rate_limiter = RateLimiter(LLM_REQUESTS_PER_MIN, LLM_TOKENS_PER_MIN)
+
+def estimate_tokens(text: str) -> int:
+    """token 數（有 tiktoken 時為實際值，否則為估算，見 token_budget.py）"""
+    return count_tokens(text)
+
+def prepare_article(article):
+    """送進 prompt 前依 token 預算裁切文章內容（同一篇只裁一次；summarize_articles 在送進執行緒池前依序呼叫）"""
+    if "text_tokens" not in article:
+        article["text"] = token_budget.fit(article.get("text", ""))
+        article["text_tokens"] = count_tokens(article["text"])
+    return article
+
+def _is_retryable(err) -> bool:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+    if isinstance(err, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(err, APIStatusError) and err.status_code >= 500
+
+def _backoff_delay(err, attempt: int) -> float:
+    # 伺服器有給 Retry-After 就照辦，否則指數退避 + full jitter
+    response = getattr(err, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_BACKOFF_MAX) + random.uniform(0, LLM_BACKOFF_BASE)
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+def _create_with_retry(model, prompt, temperature, expected_output=LLM_EXPECTED_OUTPUT_TOKENS, provider=None,
+                       **kwargs):
+    """provider：OpenAI 相容的後端（llm_providers），預設為 OpenAI"""
+    provider = provider or get_provider("openai")
+    tokens = estimate_tokens(prompt) + expected_output
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if provider.rate_limited:
+            rate_limiter.acquire(tokens)
+        t0 = time.perf_counter()
+        try:
+            res = provider.client().chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                **kwargs
+            )
+        except Exception as e:
+            metrics.incr("llm_error", kind=type(e).__name__)
+            if attempt >= LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = _backoff_delay(e, attempt)
+            print(f"  🔁 LLM 請求失敗（{type(e).__name__}），{delay:.1f} 秒後重試 {attempt + 1}/{LLM_MAX_RETRIES}")
+            time.sleep(delay)
+            continue
+        usage = getattr(res, "usage", None)
+        metrics.observe_llm(
+            model, time.perf_counter() - t0,
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+        )
+        return res
+
+# 呼叫 LLM（先查磁碟快取，bypass_cache=True 或 LLM_CACHE_BYPASS=1 時直接打 API）
+def chat_completion(prompt, model="gpt-4o", temperature=0.4, bypass_cache=False, provider=None):
+    bypass = bypass_cache or LLM_CACHE_BYPASS
+    provider = provider or get_provider("openai")
+    key = llm_cache.make_key(model, temperature, prompt, provider.name, provider.base_url)
+    if not bypass:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            metrics.incr("llm_cache_hit")
+            return cached
+
+    res = _create_with_retry(model, prompt, temperature, provider=provider)
+    content = res.choices[0].message.content.strip()
+    if not bypass:
+        llm_cache.put(key, content, model=model)
+    return content
+
+SUMMARY_TEMPERATURE = 0.4
+
+# 單篇文章的 prompt（批次模式拆不出某篇時，也用這個 prompt 逐篇補做）
+def build_article_prompt(article):
+    return f"""
 你是一位「生醫跨領域提倡者」，需要幫助讀者快速理解最新生醫/醫工文章。
 
 請針對以下文章資訊，生成一則新聞解讀，並嚴格包含五個部分，格式如下(標題須轉為繁體中文)：
@@ -29,12 +144,189 @@ def generate_news_summary_and_opinion(article):
 文章網址：{article.get('url', '')}
 """
 
-    res = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4
+def _summarize_with(provider, article, bypass_cache=False):
+    metrics.incr("llm_route", provider=provider.name)
+    return provider.summarize(article, bypass_cache)
+
+# 單篇文章處理：依分流規則選擇後端（見 llm_providers.route_article），失敗時可改用備援後端
+def generate_news_summary_and_opinion(article, bypass_cache=False):
+    prepare_article(article)
+    provider = route_article(article)
+    try:
+        return _summarize_with(provider, article, bypass_cache)
+    except Exception as e:
+        fallback = fallback_provider()
+        if fallback is None or fallback is provider:
+            raise
+        print(f"  ⚠️ {provider.name} 摘要失敗（{type(e).__name__}），改用 {fallback.name}：{article.get('title')}")
+        return _summarize_with(fallback, article, bypass_cache)
+
+# ===== 批次摘要：一次請求處理多篇，要求依文章 ID 回傳 JSON =====
+_BATCH_FIELDS = ("title", "summary", "guide", "learning_path")
+
+def build_batch_prompt(batch):
+    """batch: [(id, article)]"""
+    sections = "\n\n".join(
+        f"[{aid}]\n文章標題：{a['title']}\n文章內容：{a['text']}\n文章網址：{a.get('url', '')}"
+        for aid, a in batch
     )
-    return res.choices[0].message.content.strip()
+    return f"""
+你是一位「生醫跨領域提倡者」，需要幫助讀者快速理解最新生醫/醫工文章。
+
+以下有 {len(batch)} 篇文章，每篇以 [ID] 開頭。請「分別」為每一篇生成新聞解讀，
+只輸出一個 JSON 物件，格式如下（不要加任何其他文字）：
+{{"articles": [{{"id": "文章 ID", "title": "標題（繁體中文）",
+  "summary": "摘要：以原來文章內容的方式做翻譯，適當分段，並保留專有名詞",
+  "guide": "導讀：以初學者角度，淺白解釋，但保留專有名詞，並在括號內補充簡單定義",
+  "learning_path": "學習路徑：用「A → B → C → …」的箭頭格式，從基礎到進階，每個節點是可查詢的關鍵詞或學科領域"}}]}}
+
+---
+{sections}
+"""
+
+def render_article_markdown(item, url):
+    """把批次 JSON 中的單篇結果轉成與 generate_news_summary_and_opinion 相同格式的 Markdown"""
+    return (
+        f"# {item['title'].strip()}\n\n"
+        f"## 摘要\n{item['summary'].strip()}\n\n"
+        f"## 導讀\n{item['guide'].strip()}\n\n"
+        f"## 學習路徑\n{item['learning_path'].strip()}\n\n"
+        f"## 原文連結\n[點擊連結]({url})"
+    )
+
+def parse_batch_response(content, ids):
+    """解析批次回應，回傳 {id: item}；格式不符或欄位缺漏的文章不會出現在結果中"""
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    items = data.get("articles") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return {}
+    wanted = set(ids)
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        aid = str(item.get("id", "")).strip("[] ")
+        if aid in wanted and all(isinstance(item.get(k), str) and item[k].strip() for k in _BATCH_FIELDS):
+            parsed[aid] = item
+    return parsed
+
+def summarize_batch(articles, bypass_cache=False):
+    """
+    多篇文章合併成一次請求，回傳與輸入同順序的 [(article, summary, error)]。
+    已有單篇快取的文章不送出；批次結果也寫回單篇快取；拆不出來的文章改用單篇請求補做。
+    分流到其他後端的文章不進批次，直接逐篇處理。
+    """
+    bypass = bypass_cache or LLM_CACHE_BYPASS
+    provider = primary_provider()
+    summaries = {}
+    pending = []
+    for i, article in enumerate(articles):
+        prepare_article(article)
+        if not provider.chat or route_article(article) is not provider:
+            continue
+        key = llm_cache.make_key(provider.model, SUMMARY_TEMPERATURE, build_article_prompt(article),
+                                 provider.name, provider.base_url)
+        cached = None if bypass else llm_cache.get(key)
+        if cached is not None:
+            metrics.incr("llm_cache_hit")
+            summaries[i] = cached
+        else:
+            pending.append((f"A{i + 1}", i, key))
+
+    # 只剩一篇就不用批次格式，直接走下面的單篇請求
+    batched = pending if len(pending) > 1 else []
+    if batched:
+        batch = [(aid, articles[i]) for aid, i, _ in batched]
+        try:
+            res = _create_with_retry(
+                provider.model, build_batch_prompt(batch), SUMMARY_TEMPERATURE,
+                expected_output=LLM_EXPECTED_OUTPUT_TOKENS * len(batch), provider=provider,
+                response_format={"type": "json_object"},
+            )
+            parsed = parse_batch_response(res.choices[0].message.content, [aid for aid, _ in batch])
+        except Exception as e:
+            print(f"  ⚠️ 批次摘要失敗（{type(e).__name__}），改為逐篇請求")
+            parsed = {}
+        metrics.incr("llm_batch_request")
+        for aid, i, key in batched:
+            item = parsed.get(aid)
+            if item is None:
+                continue
+            summaries[i] = render_article_markdown(item, articles[i].get("url", ""))
+            if not bypass:
+                llm_cache.put(key, summaries[i], model=provider.model, batched=True)
+
+    batched_idx = {i for _, i, _ in batched}
+    results = []
+    for i, article in enumerate(articles):
+        if i in summaries:
+            results.append((article, summaries[i], None))
+            continue
+        if i in batched_idx:
+            metrics.incr("llm_batch_fallback")
+        try:
+            results.append((article, generate_news_summary_and_opinion(article, bypass_cache), None))
+        except Exception as e:
+            results.append((article, None, e))
+    return results
+
+def iter_batches(articles, batch_size=LLM_BATCH_SIZE, token_budget=LLM_BATCH_TOKEN_BUDGET):
+    """依篇數上限與 token 預算把文章串流切成批次（保持順序）"""
+    batch, used = [], 0
+    for article in articles:
+        prepare_article(article)
+        cost = estimate_tokens(article.get("title", "")) + article["text_tokens"]
+        if batch and (len(batch) >= batch_size or used + cost > token_budget):
+            yield batch
+            batch, used = [], 0
+        batch.append(article)
+        used += cost
+    if batch:
+        yield batch
+
+
+# 多篇文章並行摘要（執行緒池 + 限速），依輸入順序 yield (article, summary, error)
+# articles 可以是 generator：最多同時保留 max_workers * 2 篇在處理中，上游邊產生這裡邊消化
+# batch_size > 1 時改為批次請求（見 summarize_batch），每個 worker 一次處理一批
+def summarize_articles(articles, max_workers=LLM_CONCURRENCY, bypass_cache=False, batch_size=LLM_BATCH_SIZE):
+    max_workers = max(1, max_workers)
+    if batch_size and batch_size > 1:
+        yield from _summarize_batched(articles, max_workers, bypass_cache, batch_size)
+        return
+    window = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for article in articles:
+            # token 預算在送出前依入選順序扣除（在 worker 中扣會隨執行緒排程改變哪幾篇被裁切，
+            # prompt、快取鍵與分流結果也跟著每次不同）；iter_batches 同樣在這一側呼叫 prepare_article
+            prepare_article(article)
+            window.append((article, pool.submit(generate_news_summary_and_opinion, article, bypass_cache)))
+            if len(window) >= max_workers * 2:
+                yield _collect(*window.popleft())
+        while window:
+            yield _collect(*window.popleft())
+
+def _collect(article, fut):
+    try:
+        return article, fut.result(), None
+    except Exception as e:
+        return article, None, e
+
+def _summarize_batched(articles, max_workers, bypass_cache, batch_size):
+    window = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for batch in iter_batches(articles, batch_size):
+            window.append(pool.submit(summarize_batch, batch, bypass_cache))
+            if len(window) >= max_workers * 2:
+                yield from window.popleft().result()
+        while window:
+            yield from window.popleft().result()
 
 
 # 批次處理：避免爆 token
@@ -42,24 +334,23 @@ def llm_batch_summarize(paragraphs, batch_size=1):
     """
     將多篇文章逐一摘要 → 合併成總結
     paragraphs: list[str] 或 list[dict]
+    使用主要後端（llm_providers.LLM_PROVIDER）；需要對話型後端，extractive 無法合併成總結
     """
+    provider = primary_provider()
+    if not provider.chat:
+        raise ValueError(f"llm_batch_summarize 需要對話型後端，目前為 {provider.name}")
     summaries = []
 
     for i, para in enumerate(paragraphs, 1):
         # 如果傳進來是 dict，取 text
         text = para["text"] if isinstance(para, dict) else para
-        text = text[:4000]  # 安全切斷，避免單篇過長
+        text, _, _ = truncate_to_tokens(text, LLM_ARTICLE_TOKEN_LIMIT)  # 依 token 數切斷，避免單篇過長
 
         prompt = f"""
 你是一位「生醫跨領域提倡者」，請幫我濃縮以下文章重點，輸出 1 段「精簡摘要」即可：
 {text}
 """
-        res = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4
-        )
-        summary = res.choices[0].message.content.strip()
+        summary = chat_completion(prompt, model=provider.model, temperature=0.4, provider=provider)
         summaries.append(summary)
 
     # 最後合併所有摘要，再產出總結
@@ -78,13 +369,7 @@ def llm_batch_summarize(paragraphs, batch_size=1):
 {combined}
 """
 
-    res = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": final_prompt}],
-        temperature=0.4
-    )
-
-    return res.choices[0].message.content.strip()
+    return chat_completion(final_prompt, model=provider.model, temperature=0.4, provider=provider)
 
 if __name__ == "__main__":
     from generate_pdf_summary import extract_references_from_md, generate_pdf
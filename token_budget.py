@@ -0,0 +1,119 @@
+# token_budget.py
+# 送進 LLM 前的 token 計數與內容裁切：
+# 有安裝 tiktoken 且能載入編碼時用實際 tokenizer（編碼只載入一次），否則用中日韓 / 英文分開估算；
+# 每篇文章有 token 上限，整次執行另有總預算，預算用完後每篇只保留開頭的最低額度
+import re
+import threading
+from functools import lru_cache
+
+LLM_ARTICLE_TOKEN_LIMIT = 3000   # 單篇文章內容送進 prompt 的 token 上限
+LLM_RUN_TOKEN_LIMIT = 200000     # 整次執行所有文章內容的 token 總預算
+LLM_MIN_ARTICLE_TOKENS = 400     # 總預算用完後，每篇仍保留的 token 數（大致是標題後的第一段）
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o 系列
+
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+_SENTENCE_END_RE = re.compile(r"[。！？!?.;；\n]")
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4o"):
+    """回傳 tiktoken 編碼；沒安裝或下載不到編碼檔時回傳 None（改用估算）"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception:
+        return None
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中日韓文字約 1 字 1 token，其餘約 4 字元 1 token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    enc = get_encoding(model)
+    if enc is None:
+        return estimate_tokens(text)
+    return len(enc.encode(text, disallowed_special=()))
+
+def _cut_at_sentence(text: str) -> str:
+    # 截在最後 20% 內的句尾，避免斷在半個字詞或句子中間
+    tail = len(text) - max(1, len(text) // 5)
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(text, tail)]
+    return text[:ends[-1]] if ends else text
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> tuple:
+    """裁切到 max_tokens 以內，回傳 (裁切後文字, 原 token 數, 裁切後 token 數)"""
+    enc = get_encoding(model)
+    if enc is not None:
+        ids = enc.encode(text, disallowed_special=())
+        if len(ids) <= max_tokens:
+            return text, len(ids), len(ids)
+        head = _cut_at_sentence(enc.decode(ids[:max_tokens]))
+        return head, len(ids), len(enc.encode(head, disallowed_special=()))
+
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return text, total, total
+    # 估算模式：依字元逐一累計，到上限為止
+    used, end = 1, 0
+    ascii_run = 0
+    for end, ch in enumerate(text):
+        if _CJK_RE.match(ch):
+            used += 1
+        else:
+            ascii_run += 1
+            if ascii_run == 4:
+                used += 1
+                ascii_run = 0
+        if used > max_tokens:
+            break
+    head = _cut_at_sentence(text[:end])
+    return head, total, estimate_tokens(head)
+
+class TokenBudget:
+    """
+    fit(text)：依單篇上限與剩餘總預算裁切，並累計實際送出與省下的 token 數（執行緒安全）。
+    """
+
+    def __init__(self, per_article=LLM_ARTICLE_TOKEN_LIMIT, per_run=LLM_RUN_TOKEN_LIMIT,
+                 minimum=LLM_MIN_ARTICLE_TOKENS, model="gpt-4o"):
+        self.per_article = per_article
+        self.per_run = per_run
+        self.minimum = minimum
+        self.model = model
+        self.used = 0
+        self.saved = 0
+        self.trimmed = 0
+        self._lock = threading.Lock()
+
+    def _limit(self) -> int:
+        remaining = self.per_run - self.used if self.per_run else self.per_article
+        return max(self.minimum, min(self.per_article, remaining))
+
+    def fit(self, text: str) -> str:
+        if not text:
+            return text
+        with self._lock:
+            limit = self._limit()
+        trimmed, before, after = truncate_to_tokens(text, limit, self.model)
+        with self._lock:
+            self.used += after
+            if after < before:
+                self.saved += before - after
+                self.trimmed += 1
+        return trimmed
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"used": self.used, "saved": self.saved, "trimmed": self.trimmed,
+                    "exact": get_encoding(self.model) is not None}
+
+token_budget = TokenBudget()